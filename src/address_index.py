@@ -0,0 +1,297 @@
+"""Index of transaction outputs by the script they pay to
+
+AddressIndex maps a scripthash, the sha256 of an output's scriptPubKey as
+used by Electrum servers, to every output paying that script as
+(txid, vout, value, height) entries.
+
+New outputs are appended to an in-memory table. Once it holds
+memtable_size entries it is written out as a segment: a file of fixed
+width records sorted by scripthash,
+
+    scripthash (32) || height (4) || txid (32) || vout (4) || value (8)
+
+with integers in big endian, so the entries of a scripthash sort by
+height. A lookup binary searches every memory mapped segment, O(log n)
+each, and merge() folds all segments into one.
+
+Segments are written to a temporary file and renamed into place, so a
+crash never leaves a partial segment behind. A flushed segment is named
+after its number, 00000007.seg, and a merged one after the range of
+numbers it replaces, 00000001-00000009.seg. The old segments are only
+deleted once the merged one is in place, so a crash in between leaves
+both on disk; opening the index skips and deletes every segment whose
+range lies within another's.
+"""
+
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+from threading import RLock
+from typing import Iterable, Iterator, NamedTuple
+
+from interpreter import p2pkh_script
+
+
+RECORD = struct.Struct(">32sI32sIQ")
+RECORD_LEN = RECORD.size
+KEY_LEN = 32
+
+# entries kept in memory before they are written out as a segment
+DEFAULT_MEMTABLE_SIZE = 100000
+
+# segments allowed before they are merged automatically
+DEFAULT_MAX_SEGMENTS = 8
+
+SEGMENT_SUFFIX = ".seg"
+
+
+class IndexEntry(NamedTuple):
+    txid: str
+    vout: int
+    value: int
+    height: int
+
+
+def scripthash(script_pubkey: bytes) -> bytes:
+    """Returns the index key of a scriptPubKey"""
+    return hashlib.sha256(script_pubkey).digest()
+
+
+def _entry(record: tuple) -> IndexEntry:
+    _, height, txid, vout, value = record
+    return IndexEntry(txid[::-1].hex(), vout, value, height)
+
+
+def _segment_range(name: str) -> tuple[int, int]:
+    """Returns the first and last segment numbers covered by a file name"""
+    first, _, last = name[: -len(SEGMENT_SUFFIX)].partition("-")
+    return int(first), int(last or first)
+
+
+def _segment_name(first: int, last: int) -> str:
+    if first == last:
+        return f"{first:08d}{SEGMENT_SUFFIX}"
+    return f"{first:08d}-{last:08d}{SEGMENT_SUFFIX}"
+
+
+class Segment:
+    """A sorted, immutable segment file, memory mapped for lookups"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size % RECORD_LEN:
+            raise Exception(f"Truncated index segment {path}")
+
+        self.n_records = size // RECORD_LEN
+        # an empty file can not be mapped
+        if size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mmap = b""
+
+    def __repr__(self) -> str:
+        return f"Segment({self.path}, records={self.n_records})"
+
+    def __len__(self) -> int:
+        return self.n_records
+
+    def close(self) -> None:
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+    def _key(self, i: int) -> bytes:
+        start = i * RECORD_LEN
+        return self._mmap[start : start + KEY_LEN]
+
+    def _lower_bound(self, key: bytes) -> int:
+        low, high = 0, self.n_records
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, key: bytes) -> list[tuple]:
+        """Returns the raw records of a scripthash"""
+        records = []
+        i = self._lower_bound(key)
+        while i < self.n_records and self._key(i) == key:
+            records.append(RECORD.unpack_from(self._mmap, i * RECORD_LEN))
+            i += 1
+        return records
+
+    def __iter__(self) -> Iterator[tuple]:
+        for i in range(self.n_records):
+            yield RECORD.unpack_from(self._mmap, i * RECORD_LEN)
+
+
+def _write_segment(path: str, records: Iterable[tuple]) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for record in records:
+            f.write(RECORD.pack(*record))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AddressIndex:
+    """Scripthash to outputs index stored as segment files in a directory.
+
+    Appends are not durable until flush() or close(), everything else is
+    read from disk. All methods are thread safe"""
+
+    def __init__(
+        self,
+        directory: str,
+        memtable_size: int = DEFAULT_MEMTABLE_SIZE,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+    ) -> None:
+        if memtable_size < 1:
+            raise ValueError(f"Memtable size {memtable_size} must be positive")
+
+        self.directory = directory
+        self.memtable_size = memtable_size
+        self.max_segments = max_segments
+        # scripthash -> records not written to a segment yet
+        self._memtable = {}
+        self._memtable_len = 0
+        self._lock = RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        ranges = {
+            name: _segment_range(name)
+            for name in os.listdir(directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        }
+        names = []
+        for name, (first, last) in sorted(ranges.items(), key=lambda item: item[1]):
+            replaced = any(
+                other != name and low <= first and last <= high
+                for other, (low, high) in ranges.items()
+            )
+            if replaced:
+                # left behind by a merge interrupted before cleaning up
+                os.remove(os.path.join(directory, name))
+            else:
+                names.append(name)
+
+        self.segments = [Segment(os.path.join(directory, name)) for name in names]
+        self._next_segment = 1 + max(
+            (last for _, last in ranges.values()), default=0
+        )
+
+    def __repr__(self) -> str:
+        return f"AddressIndex({self.directory}, segments={len(self.segments)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments) + self._memtable_len
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            for segment in self.segments:
+                segment.close()
+            self.segments = []
+
+    def _segment_path(self, first: int | None = None) -> str:
+        """Returns the path of the next segment, covering the numbers from
+        first when it replaces older segments"""
+        last = self._next_segment
+        self._next_segment += 1
+        name = _segment_name(last if first is None else first, last)
+        return os.path.join(self.directory, name)
+
+    def add(self, script_pubkey: bytes, txid: str, vout: int, value: int, height: int):
+        """Appends a single output to the index"""
+        with self._lock:
+            key = scripthash(script_pubkey)
+            self._append((key, height, bytes.fromhex(txid)[::-1], vout, value))
+            if self._memtable_len >= self.memtable_size:
+                self.flush()
+
+    def _append(self, record: tuple) -> None:
+        self._memtable.setdefault(record[0], []).append(record)
+        self._memtable_len += 1
+
+    def add_transactions(self, transactions: Iterable, height: int) -> None:
+        """Appends every output of the transactions, the transactions of a
+        block at height. OP_RETURN outputs are not indexed"""
+        with self._lock:
+            for tx in transactions:
+                txid = bytes.fromhex(tx.txid)[::-1]
+                for vout, output in enumerate(tx.outputs):
+                    script = output.script
+                    if script.is_return():
+                        continue
+                    key = scripthash(script.bytes)
+                    self._append((key, height, txid, vout, output.value))
+
+            if self._memtable_len >= self.memtable_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Writes the in-memory entries out as a new segment"""
+        with self._lock:
+            if not self._memtable:
+                return
+
+            records = sorted(
+                record for records in self._memtable.values() for record in records
+            )
+            path = self._segment_path()
+            _write_segment(path, records)
+            self._memtable = {}
+            self._memtable_len = 0
+            self.segments.append(Segment(path))
+
+            if self.max_segments and len(self.segments) > self.max_segments:
+                self.merge()
+
+    def merge(self) -> None:
+        """Merges every segment into a single one"""
+        with self._lock:
+            if len(self.segments) < 2:
+                return
+
+            old = self.segments
+            first = min(
+                _segment_range(os.path.basename(segment.path))[0] for segment in old
+            )
+            path = self._segment_path(first)
+            _write_segment(path, heapq.merge(*old))
+            self.segments = [Segment(path)]
+            for segment in old:
+                segment.close()
+                os.remove(segment.path)
+
+    def lookup(self, key: bytes) -> list[IndexEntry]:
+        """Returns every output paying to a scripthash, sorted by height"""
+        with self._lock:
+            records = list(self._memtable.get(key, ()))
+            for segment in self.segments:
+                records += segment.lookup(key)
+        return [_entry(record) for record in sorted(records)]
+
+    def lookup_script(self, script_pubkey: bytes) -> list[IndexEntry]:
+        return self.lookup(scripthash(script_pubkey))
+
+    def lookup_hash160(self, h160: bytes) -> list[IndexEntry]:
+        """Returns the outputs paying to a public key hash, through p2pkh or
+        p2wpkh scripts"""
+        entries = self.lookup_script(p2pkh_script(h160))
+        entries += self.lookup_script(b"\x00\x14" + h160)
+        return sorted(entries, key=lambda entry: entry.height)
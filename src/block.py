@@ -0,0 +1,119 @@
+from utils import decode_varint, decode_uint32, double_sha256, format_hash
+from transaction import Transaction
+
+
+# Length of a serialized block header
+BLOCK_HEADER_LEN = 80
+
+
+class BlockHeader:
+    """Represents a block header, fields are decoded on first access"""
+
+    def __init__(self, raw_hex: bytes, offset: int = 0):
+        self._buffer = raw_hex
+        self._offset = offset
+        self._hash = None
+
+        if offset + BLOCK_HEADER_LEN > len(raw_hex):
+            raise Exception("Incomplete block header!")
+
+    def __repr__(self):
+        return f"BlockHeader({self.hash})"
+
+    def _slice(self, start, end):
+        return self._buffer[self._offset + start : self._offset + end]
+
+    @property
+    def hex(self):
+        """Returns the raw bytes of the header"""
+        return bytes(self._slice(0, BLOCK_HEADER_LEN))
+
+    @property
+    def version(self):
+        """Returns the block's version number"""
+        return decode_uint32(self._slice(0, 4))
+
+    @property
+    def previous_block_hash(self):
+        """Returns the hash of the previous block"""
+        return format_hash(self._slice(4, 36))
+
+    @property
+    def merkle_root(self):
+        """Returns the merkle root of the block's transactions"""
+        return format_hash(self._slice(36, 68))
+
+    @property
+    def timestamp(self):
+        """Returns the block's timestamp as a unix time int"""
+        return decode_uint32(self._slice(68, 72))
+
+    @property
+    def bits(self):
+        """Returns the compact encoding of the block's target"""
+        return decode_uint32(self._slice(72, 76))
+
+    @property
+    def nonce(self):
+        """Returns the block's nonce"""
+        return decode_uint32(self._slice(76, 80))
+
+    @property
+    def hash(self):
+        """Returns the block's hash, the double sha256 of the header"""
+        if self._hash is None:
+            self._hash = format_hash(double_sha256(self._slice(0, BLOCK_HEADER_LEN)))
+        return self._hash
+
+
+class Block:
+    """Represents a block, transactions are only parsed when iterated over"""
+
+    def __init__(self, raw_hex: bytes, offset: int = 0, size: int = None):
+        buffer = memoryview(raw_hex)
+        self._buffer = buffer
+        self._offset = offset
+        self.size = len(buffer) - offset if size is None else size
+
+        # offset of the block's frame when read from a blk*.dat file
+        self.file_offset = None
+
+        if offset + self.size > len(buffer):
+            raise Exception("Incomplete block!")
+
+        self.header = BlockHeader(buffer, offset)
+        cursor = offset + BLOCK_HEADER_LEN
+        self.n_transactions, varint_size = decode_varint(buffer, cursor)
+        self._transactions_start = cursor + varint_size
+
+    def __repr__(self):
+        return f"Block({self.hash})"
+
+    @classmethod
+    def from_hex(cls, hex: bytes, offset: int = 0, size: int = None):
+        return cls(hex, offset, size)
+
+    @property
+    def hash(self):
+        """Returns the block's hash"""
+        return self.header.hash
+
+    @property
+    def hex(self):
+        """Returns the raw bytes of the block"""
+        return bytes(self._buffer[self._offset : self._offset + self.size])
+
+    @property
+    def transactions(self):
+        """Yields the block's transactions one at a time, each one parsed in
+        place from the block's buffer. Their inputs and outputs are only
+        built when first accessed"""
+        cursor = self._transactions_start
+        end = self._offset + self.size
+        for i in range(self.n_transactions):
+            tx = Transaction.from_hex(self._buffer, cursor, lazy=True)
+            cursor += tx.size
+            if cursor > end:
+                raise Exception("Transaction overruns the block!")
+
+            yield tx
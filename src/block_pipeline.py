@@ -0,0 +1,106 @@
+"""Parallel block parsing over a process pool
+
+The parent process only walks the magic/length framing of each blk*.dat
+file, which touches 8 bytes per block, and sends (path, file offsets)
+tasks to the workers. Every worker memory maps the files itself, so block
+bytes are shared through the page cache instead of being pickled. Results
+come back in file order, with at most max_pending tasks in flight.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from block import Block
+from block_reader import BlockFileReader, FRAME_HEADER_LEN, MAINNET_MAGIC
+
+
+class BlockSummary(NamedTuple):
+    hash: str
+    n_transactions: int
+    txids: list[str]
+
+
+def block_summary(block: Block) -> BlockSummary:
+    """Default handler, returns the block hash and the txids of the block"""
+    txids = [tx.txid for tx in block.transactions]
+    return BlockSummary(block.hash, block.n_transactions, txids)
+
+
+# reader of the file a worker process is on, kept open between its tasks.
+# Tasks arrive in file order, so the previous file's reader is closed as
+# soon as a task for the next file comes in and a worker never holds more
+# than one file open
+_current_reader = None
+
+
+def _reader(path: str, magic: bytes) -> BlockFileReader:
+    global _current_reader
+    reader = _current_reader
+    if reader is not None and reader.path == path and reader.magic == magic:
+        return reader
+
+    if reader is not None:
+        reader.close()
+    _current_reader = BlockFileReader(path, magic)
+    return _current_reader
+
+
+def _parse_task(
+    task: tuple[str, list[int]], handler: Callable, magic: bytes
+) -> list:
+    path, offsets = task
+    reader = _reader(path, magic)
+    return [handler(reader.block_at(offset)) for offset in offsets]
+
+
+def _tasks(
+    paths: Iterable[str], magic: bytes, blocks_per_task: int
+) -> Iterator[tuple[str, list[int]]]:
+    for path in paths:
+        offsets = []
+        with BlockFileReader(path, magic) as reader:
+            for start, _ in reader.frames():
+                offsets.append(start - FRAME_HEADER_LEN)
+                if len(offsets) == blocks_per_task:
+                    yield path, offsets
+                    offsets = []
+
+        if offsets:
+            yield path, offsets
+
+
+def parse_blocks(
+    paths: Iterable[str],
+    handler: Callable[[Block], object] = block_summary,
+    workers: int | None = None,
+    max_pending: int | None = None,
+    blocks_per_task: int = 1,
+    magic: bytes = MAINNET_MAGIC,
+) -> Iterator:
+    """Yields handler(block) for every block of the given blk*.dat files in
+    file order. With more than one worker the blocks are parsed on a process
+    pool, handler must then be a picklable module level function and its
+    results are pickled back. max_pending bounds the tasks in flight and
+    defaults to 2 * workers"""
+    if not workers or workers <= 1:
+        for path in paths:
+            with BlockFileReader(path, magic) as reader:
+                for block in reader:
+                    yield handler(block)
+        return
+
+    task_func = partial(_parse_task, handler=handler, magic=magic)
+    tasks = _tasks(paths, magic, blocks_per_task)
+
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(task_func, task))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
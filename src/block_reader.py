@@ -0,0 +1,117 @@
+import mmap
+import os
+from typing import Iterator
+
+from utils import decode_uint32
+from block import Block
+
+
+# Network magic bytes that prefix every block in a blk*.dat file
+MAINNET_MAGIC = bytes.fromhex("f9beb4d9")
+TESTNET_MAGIC = bytes.fromhex("0b110907")
+SIGNET_MAGIC = bytes.fromhex("0a03cf40")
+REGTEST_MAGIC = bytes.fromhex("fabfb5da")
+
+# magic (4 bytes) followed by the block size as a little endian uint32
+FRAME_HEADER_LEN = 8
+
+
+def blk_files(directory: str) -> list[str]:
+    """Returns the paths of the blk*.dat files in a directory, in file order"""
+    names = [
+        name
+        for name in os.listdir(directory)
+        if name.startswith("blk") and name.endswith(".dat")
+    ]
+    return [os.path.join(directory, name) for name in sorted(names)]
+
+
+class BlockFileReader:
+    """Streams blocks out of a Bitcoin Core blk*.dat file.
+
+    The file is memory mapped rather than read, so blocks and the
+    transactions inside of them are parsed straight from the page cache and
+    only the parts that are touched are ever loaded into memory.
+
+    Files written by Bitcoin Core 28 and later may be obfuscated with the key
+    in xor.dat, those must be deobfuscated before they can be read here."""
+
+    def __init__(self, path: str, magic: bytes = MAINNET_MAGIC):
+        self.path = path
+        self.magic = magic
+        self._file = open(path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+
+        # an empty file can not be mapped
+        if self._size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = memoryview(self._mmap)
+        else:
+            self._mmap = None
+            self._buffer = memoryview(b"")
+
+    def __repr__(self):
+        return f"BlockFileReader({self.path})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self) -> Iterator[Block]:
+        return self.blocks()
+
+    def close(self):
+        self._buffer.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # blocks still referencing the map keep it alive, it is
+                # unmapped once they are garbage collected
+                pass
+
+        self._file.close()
+
+    def frames(self, offset: int = 0) -> Iterator[tuple[int, int]]:
+        """Yields (offset, size) of every block starting at or after the file
+        offset, offset is where the block's own bytes begin"""
+        buffer = self._buffer
+        while offset + FRAME_HEADER_LEN <= self._size:
+            magic = buffer[offset : offset + 4]
+
+            # Bitcoin Core preallocates files, the rest of the file is zeros
+            if magic == b"\x00\x00\x00\x00":
+                return
+
+            if magic != self.magic:
+                raise ValueError(
+                    f"Unexpected magic {bytes(magic).hex()} at offset {offset} "
+                    f"in {self.path}"
+                )
+
+            size = decode_uint32(buffer[offset + 4 : offset + FRAME_HEADER_LEN])
+            start = offset + FRAME_HEADER_LEN
+            if start + size > self._size:
+                raise Exception(f"Incomplete block at offset {offset} in {self.path}")
+
+            yield start, size
+            offset = start + size
+
+    def blocks(self, offset: int = 0) -> Iterator[Block]:
+        """Yields the blocks of the file lazily, starting from the frame at the
+        file offset, which must point to a block's magic bytes"""
+        for start, size in self.frames(offset):
+            block = Block.from_hex(self._buffer, start, size)
+            block.file_offset = start - FRAME_HEADER_LEN
+            yield block
+
+    def block_at(self, offset: int) -> Block:
+        """Returns the single block whose magic bytes are at the file offset"""
+        return next(self.blocks(offset))
+
+    def transactions(self, offset: int = 0):
+        """Yields every transaction of every block starting at offset"""
+        for block in self.blocks(offset):
+            yield from block.transactions
@@ -0,0 +1,48 @@
+from typing import Iterable
+
+from ecc.const import P, N
+from ecc.jacobian import joint_multiply
+from ecc.point import S256Point, G
+from ecc.sign import Signature
+from ecc.utils import batch_inverse
+
+
+def verify_batch(items: Iterable[tuple[S256Point, int, Signature]]) -> list[bool]:
+    """Verifies many (public point, z, signature) triples, returns a bool for
+    each item in order.
+
+    The s values of all signatures are inverted together, every u * G uses
+    the shared generator table, and the result of each u * G + v * Q is
+    compared against r in Jacobian coordinates so no field inversions are
+    needed at all."""
+    items = list(items)
+    results = [False] * len(items)
+
+    # signatures with r or s out of range can never be valid
+    checked = [
+        i
+        for i, (point, _, sig) in enumerate(items)
+        if 0 < sig.r < N and 0 < sig.s < N and point.x is not None
+    ]
+    if not checked:
+        return results
+
+    s_invs = batch_inverse([items[i][2].s for i in checked], N)
+
+    g = (G.x.num, G.y.num)
+    for i, s_inv in zip(checked, s_invs):
+        point, z, sig = items[i]
+        u = z * s_inv % N
+        v = sig.r * s_inv % N
+        x, _, zz = joint_multiply(u, g, v, (point.x.num, point.y.num))
+        if zz == 0:
+            continue
+
+        # affine x is X / Z^2, so compare X against r * Z^2 instead, r + N
+        # also matches when the affine x was reduced mod N
+        z2 = zz * zz % P
+        results[i] = x == sig.r * z2 % P or (
+            sig.r + N < P and x == (sig.r + N) * z2 % P
+        )
+
+    return results
@@ -0,0 +1,142 @@
+"""Bulk key derivation, spread over worker processes
+
+Work is split into chunks of secrets. Each chunk is multiplied by G with
+the fixed base table and normalized to affine with a single shared
+inversion, then turned into compact KeyRecord tuples. Only a bounded
+number of chunks is in flight at any time, so memory stays flat however
+long the input is, and results are yielded in input order.
+
+Consecutive secrets are cheaper still, each task computes a single
+start * G and then walks the range with one mixed addition of G per key.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from ecc.const import N
+from ecc.jacobian import (
+    G,
+    generator_multiply,
+    jacobian_add_affine,
+    normalize_batch,
+)
+from ecc.point import S256Point
+from ecc.utils import encode_base58_checksum, hash160
+
+# number of secrets handled by a single task
+CHUNK_SIZE = 1024
+
+
+class KeyRecord(NamedTuple):
+    secret: int
+    sec: bytes
+    hash160: bytes
+    address: str
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def map_ordered(
+    func: Callable, tasks: Iterable, workers: int | None = None
+) -> Iterator:
+    """Yields func(task) for every task in order. With more than one worker
+    the calls run on a process pool with at most 2 * workers tasks pending,
+    func and the tasks must be picklable"""
+    if not workers or workers <= 1:
+        yield from map(func, tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(func, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _key_records(
+    secrets: list[int],
+    points: list[tuple[int, int]],
+    compressed: bool,
+    testnet: bool,
+) -> list[KeyRecord]:
+    prefix = b"\x6f" if testnet else b"\x00"
+    records = []
+    for secret, point in zip(secrets, points):
+        sec = S256Point._from_affine(point).sec(compressed)
+        h160 = hash160(sec)
+        address = encode_base58_checksum(prefix + h160)
+        records.append(KeyRecord(secret, sec, h160, address))
+
+    return records
+
+
+def derive_chunk(
+    secrets: list[int], compressed: bool = True, testnet: bool = False
+) -> list[KeyRecord]:
+    for secret in secrets:
+        if secret % N == 0:
+            raise ValueError(f"Secret {secret} is not a valid private key")
+
+    points = normalize_batch([generator_multiply(secret % N) for secret in secrets])
+    return _key_records(secrets, points, compressed, testnet)
+
+
+def derive_keys(
+    secrets: Iterable[int],
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    compressed: bool = True,
+    testnet: bool = False,
+) -> Iterator[KeyRecord]:
+    """Yields a KeyRecord for every secret, in the same order"""
+    func = partial(derive_chunk, compressed=compressed, testnet=testnet)
+    for records in map_ordered(func, chunked(secrets, chunk_size), workers):
+        yield from records
+
+
+def scan_chunk(
+    task: tuple[int, int], compressed: bool = True, testnet: bool = False
+) -> list[KeyRecord]:
+    start, count = task
+    current = generator_multiply(start % N)
+    points = [current]
+    for _ in range(count - 1):
+        # (k + 1) * G == k * G + G
+        current = jacobian_add_affine(current, G)
+        points.append(current)
+
+    secrets = range(start, start + count)
+    return _key_records(secrets, normalize_batch(points), compressed, testnet)
+
+
+def scan_range(
+    start: int,
+    count: int,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    compressed: bool = True,
+    testnet: bool = False,
+) -> Iterator[KeyRecord]:
+    """Yields a KeyRecord for each of the secrets start, start + 1, ...
+    start + count - 1, with sub ranges of chunk_size split across workers"""
+    if start <= 0 or start + count > N:
+        raise ValueError(f"Range {start} + {count} is not within 1 to N - 1")
+
+    tasks = (
+        (offset, min(chunk_size, start + count - offset))
+        for offset in range(start, start + count, chunk_size)
+    )
+    func = partial(scan_chunk, compressed=compressed, testnet=testnet)
+    for records in map_ordered(func, tasks, workers):
+        yield from records
@@ -0,0 +1,139 @@
+import random
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """Bounded, thread safe least recently used cache with hit/miss counters.
+
+    Setting maxsize to 0 or enabled to False turns the cache off, every get
+    is then a miss and nothing is stored."""
+
+    def __init__(self, maxsize: int = 1024, enabled: bool = True) -> None:
+        if maxsize < 0:
+            raise ValueError(f"Cache size {maxsize} can not be negative")
+
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"LRUCache(size={len(self)}, maxsize={self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if self.enabled and key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        if not self.enabled or self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def resize(self, maxsize: int) -> None:
+        if maxsize < 0:
+            raise ValueError(f"Cache size {maxsize} can not be negative")
+
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _evict(self) -> None:
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+class RandomCache(LRUCache):
+    """Bounded, thread safe cache that evicts a random entry when full.
+
+    Lookups never reorder anything, so a hit only takes the lock to count
+    it. Entries are kept in a list next to the dict so a random one can be
+    removed in constant time."""
+
+    def __init__(self, maxsize: int = 1024, enabled: bool = True) -> None:
+        super().__init__(maxsize, enabled)
+        self._data = {}
+        # key -> position in _keys
+        self._positions = {}
+        self._keys = []
+
+    def __repr__(self) -> str:
+        return (
+            f"RandomCache(size={len(self)}, maxsize={self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def get(self, key, default=None):
+        with self._lock:
+            if self.enabled and key in self._data:
+                self.hits += 1
+                return self._data[key]
+
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        if not self.enabled or self.maxsize == 0:
+            return
+
+        with self._lock:
+            if key not in self._data:
+                self._positions[key] = len(self._keys)
+                self._keys.append(key)
+            self._data[key] = value
+            self._evict()
+
+    def clear(self) -> None:
+        # everything under one lock, a put between clearing the dict and
+        # the key list would leave them out of step
+        with self._lock:
+            self._data.clear()
+            self._positions.clear()
+            self._keys.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def _evict(self) -> None:
+        keys = self._keys
+        while len(keys) > self.maxsize:
+            # move the last key into the evicted key's slot
+            i = random.randrange(len(keys))
+            key = keys[i]
+            last = keys.pop()
+            if i < len(keys):
+                keys[i] = last
+                self._positions[last] = i
+            del self._positions[key]
+            del self._data[key]
+            self.evictions += 1
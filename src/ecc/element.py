@@ -3,9 +3,12 @@ from typing import Self
 from unittest import TestCase
 
 from ecc.const import P
+from ecc.utils import batch_inverse
 
 
 class FieldElement:
+    __slots__ = ("num", "prime")
+
     def __init__(self, num: int, prime: int) -> None:
         if num >= prime or num < 0:
             err = f"Num {num} is not in field range 0 to {prime - 1}"
@@ -77,11 +80,37 @@ class FieldElement:
         num = (self.num * coefficient) % self.prime
         return self.__class__(num=num, prime=self.prime)
 
+    @classmethod
+    def batch_inverse(cls, elements: list[Self]) -> list[Self]:
+        """returns 1 / element for every element with a single field inversion"""
+        if not elements:
+            return []
+
+        prime = elements[0].prime
+        if any(element.prime != prime for element in elements):
+            raise TypeError("Cannot invert numbers in different Fields together")
+
+        nums = batch_inverse([element.num for element in elements], prime)
+        return [
+            element.__class__(num, prime) for element, num in zip(elements, nums)
+        ]
+
 
 class S256FieldElement(FieldElement):
+    __slots__ = ()
+
     def __init__(self, num: int, prime: int = None) -> None:
         super().__init__(num, prime=P)
 
+    @classmethod
+    def _trusted(cls, num: int) -> Self:
+        """builds an element from an int already reduced mod P, skipping the
+        range check, only for results of internal arithmetic"""
+        element = object.__new__(cls)
+        element.num = num
+        element.prime = P
+        return element
+
     def sqrt(self) -> Self:
         return self ** ((P + 1) // 4)
 
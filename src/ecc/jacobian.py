@@ -0,0 +1,361 @@
+"""Inversion free secp256k1 arithmetic in Jacobian (X:Y:Z) coordinates
+
+A Jacobian point (X, Y, Z) represents the affine point (X / Z^2, Y / Z^3),
+which lets additions and doublings be computed with multiplications only.
+A single modular inversion is needed at the end to get back to affine.
+
+Points are plain int tuples so that no FieldElement objects are created
+inside the hot loops. Affine points are (x, y) tuples, None is infinity.
+"""
+
+from ecc.const import P, N
+from ecc.element import Gx, Gy
+from ecc.utils import batch_inverse
+
+# point at infinity, any point with Z == 0 is infinity
+INFINITY = (1, 1, 0)
+
+# affine generator point
+G = (Gx.num, Gy.num)
+
+# bits per window of the fixed base generator table
+G_WINDOW = 4
+
+# row i holds the affine multiples j * 2^(G_WINDOW * i) * G for j >= 1,
+# built on first use
+_g_table = None
+
+# wNAF window widths used by joint multiplication, G gets a wider window
+# since its table of odd multiples is only built once
+NAF_WINDOW = 5
+G_NAF_WINDOW = 8
+
+# affine odd multiples G, 3G, 5G, ... for G_NAF_WINDOW and the same
+# multiples of phi(G), built on first use
+_g_odd_multiples = None
+
+# secp256k1 endomorphism, lambda * (x, y) == (beta * x, y) for every point
+BETA = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+LAMBDA = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
+
+# short lattice basis used to split a scalar into two ~128 bit halves
+GLV_A1 = 0x3086D221A7D46BCDE86C90E49284EB15
+GLV_B1 = -0xE4437ED6010E88286F547FA90ABFE4C3
+GLV_A2 = 0x114CA50F7A8E2F3F657C1108D9D44CFD8
+GLV_B2 = GLV_A1
+
+
+def to_jacobian(point: tuple[int, int] | None) -> tuple[int, int, int]:
+    if point is None:
+        return INFINITY
+
+    return (point[0], point[1], 1)
+
+
+def from_jacobian(point: tuple[int, int, int]) -> tuple[int, int] | None:
+    x, y, z = point
+    if z == 0:
+        return None
+
+    z_inv = pow(z, -1, P)
+    z_inv2 = z_inv * z_inv % P
+
+    return (x * z_inv2 % P, y * z_inv2 * z_inv % P)
+
+
+def normalize_batch(
+    points: list[tuple[int, int, int]]
+) -> list[tuple[int, int] | None]:
+    """Converts many Jacobian points to affine sharing a single inversion"""
+    finite = [point for point in points if point[2] != 0]
+    z_invs = iter(batch_inverse([point[2] for point in finite], P))
+
+    result = []
+    for x, y, z in points:
+        if z == 0:
+            result.append(None)
+            continue
+
+        z_inv = next(z_invs)
+        z_inv2 = z_inv * z_inv % P
+        result.append((x * z_inv2 % P, y * z_inv2 * z_inv % P))
+
+    return result
+
+
+def jacobian_double(point: tuple[int, int, int]) -> tuple[int, int, int]:
+    """dbl-2009-l, valid for curves with a = 0"""
+    x, y, z = point
+    if z == 0 or y == 0:
+        return INFINITY
+
+    a = x * x % P
+    b = y * y % P
+    c = b * b % P
+    d = 2 * ((x + b) ** 2 - a - c) % P
+    e = 3 * a % P
+    f = e * e % P
+
+    x3 = (f - 2 * d) % P
+    y3 = (e * (d - x3) - 8 * c) % P
+    z3 = 2 * y * z % P
+
+    return (x3, y3, z3)
+
+
+def jacobian_add(
+    p1: tuple[int, int, int], p2: tuple[int, int, int]
+) -> tuple[int, int, int]:
+    """add-2007-bl, general addition of two Jacobian points"""
+    x1, y1, z1 = p1
+    x2, y2, z2 = p2
+    if z1 == 0:
+        return p2
+
+    if z2 == 0:
+        return p1
+
+    z1z1 = z1 * z1 % P
+    z2z2 = z2 * z2 % P
+    u1 = x1 * z2z2 % P
+    u2 = x2 * z1z1 % P
+    s1 = y1 * z2 * z2z2 % P
+    s2 = y2 * z1 * z1z1 % P
+    h = (u2 - u1) % P
+    r = (s2 - s1) % P
+
+    # same x coordinate, either the same point or additive inverses
+    if h == 0:
+        if r == 0:
+            return jacobian_double(p1)
+
+        return INFINITY
+
+    hh = h * h % P
+    hhh = h * hh % P
+    v = u1 * hh % P
+
+    x3 = (r * r - hhh - 2 * v) % P
+    y3 = (r * (v - x3) - s1 * hhh) % P
+    z3 = z1 * z2 * h % P
+
+    return (x3, y3, z3)
+
+
+def jacobian_add_affine(
+    p1: tuple[int, int, int], p2: tuple[int, int] | None
+) -> tuple[int, int, int]:
+    """Mixed addition of a Jacobian point and an affine point (Z2 == 1)"""
+    if p2 is None:
+        return p1
+
+    x1, y1, z1 = p1
+    x2, y2 = p2
+    if z1 == 0:
+        return (x2, y2, 1)
+
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    h = (u2 - x1) % P
+    r = (s2 - y1) % P
+
+    if h == 0:
+        if r == 0:
+            return jacobian_double(p1)
+
+        return INFINITY
+
+    hh = h * h % P
+    hhh = h * hh % P
+    v = x1 * hh % P
+
+    x3 = (r * r - hhh - 2 * v) % P
+    y3 = (r * (v - x3) - y1 * hhh) % P
+    z3 = z1 * h % P
+
+    return (x3, y3, z3)
+
+
+def jacobian_multiply(
+    point: tuple[int, int] | None, coefficient: int
+) -> tuple[int, int, int]:
+    """Left to right double and add of an affine point, result is Jacobian"""
+    result = INFINITY
+    if point is None or coefficient == 0:
+        return result
+
+    for bit in bin(coefficient)[2:]:
+        result = jacobian_double(result)
+        if bit == "1":
+            result = jacobian_add_affine(result, point)
+
+    return result
+
+
+def _build_g_table() -> list[list[tuple[int, int]]]:
+    size = (1 << G_WINDOW) - 1
+    points = []
+    base = to_jacobian(G)
+    for _ in range(0, 256, G_WINDOW):
+        current = base
+        points.append(current)
+        for _ in range(size - 1):
+            current = jacobian_add(current, base)
+            points.append(current)
+
+        # next row starts at 2^G_WINDOW times this row's base
+        base = jacobian_add(current, base)
+
+    points = normalize_batch(points)
+    return [points[i : i + size] for i in range(0, len(points), size)]
+
+
+def generator_multiply(coefficient: int) -> tuple[int, int, int]:
+    """Fixed base multiplication coefficient * G using the precomputed table,
+    one mixed addition per non zero window and no doublings.
+    coefficient must be in the range 0 to 2^256 - 1"""
+    global _g_table
+    if _g_table is None:
+        _g_table = _build_g_table()
+
+    mask = (1 << G_WINDOW) - 1
+    result = INFINITY
+    for row in _g_table:
+        digit = coefficient & mask
+        if digit:
+            result = jacobian_add_affine(result, row[digit - 1])
+
+        coefficient >>= G_WINDOW
+
+    return result
+
+
+def wnaf(coefficient: int, width: int) -> list[int]:
+    """Width-w non adjacent form, least significant digit first. Every non
+    zero digit is odd and smaller than 2^(width - 1) in absolute value"""
+    digits = []
+    half = 1 << (width - 1)
+    mask = (1 << width) - 1
+    while coefficient:
+        digit = 0
+        if coefficient & 1:
+            digit = coefficient & mask
+            if digit >= half:
+                digit -= 1 << width
+            coefficient -= digit
+
+        digits.append(digit)
+        coefficient >>= 1
+
+    return digits
+
+
+def odd_multiples(
+    point: tuple[int, int, int], width: int
+) -> list[tuple[int, int, int]]:
+    """Jacobian multiples P, 3P, 5P, ... (2^(width - 1) - 1)P"""
+    twice = jacobian_double(point)
+    table = [point]
+    for _ in range((1 << (width - 2)) - 1):
+        table.append(jacobian_add(table[-1], twice))
+
+    return table
+
+
+def _negate(point: tuple) -> tuple:
+    # works for both affine (x, y) and Jacobian (x, y, z) tuples
+    return (point[0], (P - point[1]) % P) + point[2:]
+
+
+def _g_naf_tables() -> tuple[list, list]:
+    global _g_odd_multiples
+    if _g_odd_multiples is None:
+        table = normalize_batch(odd_multiples(to_jacobian(G), G_NAF_WINDOW))
+        phi_table = [(BETA * x % P, y) for x, y in table]
+        _g_odd_multiples = (table, phi_table)
+
+    return _g_odd_multiples
+
+
+def strauss_multiply(terms: list[tuple]) -> tuple[int, int, int]:
+    """Sum of several scalar multiplications sharing one doubling chain.
+    Each term is (wnaf digits, table of odd multiples, add function) where
+    the add function is jacobian_add or jacobian_add_affine to match the
+    coordinates of the table"""
+    result = INFINITY
+    length = max((len(digits) for digits, _, _ in terms), default=0)
+    for i in range(length - 1, -1, -1):
+        result = jacobian_double(result)
+        for digits, table, add in terms:
+            if i >= len(digits):
+                continue
+
+            digit = digits[i]
+            if digit > 0:
+                result = add(result, table[digit >> 1])
+            elif digit < 0:
+                result = add(result, _negate(table[-digit >> 1]))
+
+    return result
+
+
+def glv_split(coefficient: int) -> tuple[int, int]:
+    """Splits coefficient into k1, k2 of about 128 bits each, possibly
+    negative, such that k1 + k2 * LAMBDA == coefficient mod N"""
+    c1 = (GLV_B2 * coefficient + N // 2) // N
+    c2 = (-GLV_B1 * coefficient + N // 2) // N
+    k1 = coefficient - c1 * GLV_A1 - c2 * GLV_A2
+    k2 = -c1 * GLV_B1 - c2 * GLV_B2
+
+    return k1, k2
+
+
+def _glv_terms(coefficient: int, point: tuple[int, int]) -> list[tuple]:
+    # coefficient * P == k1 * P + k2 * phi(P) with phi(x, y) = (beta * x, y),
+    # so both halves share the doublings of a ~128 bit chain
+    if point == G:
+        table, phi_table = _g_naf_tables()
+        width = G_NAF_WINDOW
+    else:
+        # one shared inversion makes the table affine so that every
+        # addition in the chain can be a cheaper mixed addition
+        table = normalize_batch(odd_multiples(to_jacobian(point), NAF_WINDOW))
+        phi_table = [(BETA * x % P, y) for x, y in table]
+        width = NAF_WINDOW
+
+    terms = []
+    for k, points in zip(glv_split(coefficient), (table, phi_table)):
+        if k < 0:
+            k = -k
+            points = [_negate(point) for point in points]
+
+        terms.append((wnaf(k, width), points, jacobian_add_affine))
+
+    return terms
+
+
+def glv_multiply(
+    point: tuple[int, int] | None, coefficient: int
+) -> tuple[int, int, int]:
+    """Variable base multiplication using the secp256k1 endomorphism,
+    coefficient must already be reduced mod N"""
+    if point is None or coefficient == 0:
+        return INFINITY
+
+    return strauss_multiply(_glv_terms(coefficient, point))
+
+
+def joint_multiply(
+    u: int, p: tuple[int, int] | None, v: int, q: tuple[int, int] | None
+) -> tuple[int, int, int]:
+    """Shamir's trick, u * p + v * q with interleaved wNAF windows. u and v
+    must already be reduced mod N"""
+    terms = []
+    for coefficient, point in ((u, p), (v, q)):
+        if point is None or coefficient == 0:
+            continue
+
+        terms.extend(_glv_terms(coefficient, point))
+
+    return strauss_multiply(terms)
@@ -1,11 +1,13 @@
 import hmac
 import hashlib
 import secrets
+from typing import Iterable, Iterator
 
 from ecc.point import G, N
 from ecc.sign import Signature
 from ecc.point import encode_base58_checksum
 from ecc.element import S256FieldElement
+from ecc.bulk import KeyRecord, derive_keys, scan_range
 
 
 class PrivateKey:
@@ -13,6 +15,35 @@ class PrivateKey:
         self.secret = secret
         self.point = secret * G
 
+    @classmethod
+    def derive_many(
+        cls,
+        secrets: Iterable[int],
+        workers: int | None = None,
+        compressed: bool = True,
+        testnet: bool = False,
+    ) -> Iterator[KeyRecord]:
+        """Lazily yields (secret, sec, hash160, address) records for many
+        secrets, spreading the work over `workers` processes"""
+        return derive_keys(
+            secrets, workers=workers, compressed=compressed, testnet=testnet
+        )
+
+    @classmethod
+    def scan_range(
+        cls,
+        start: int,
+        count: int,
+        workers: int | None = None,
+        compressed: bool = True,
+        testnet: bool = False,
+    ) -> Iterator[KeyRecord]:
+        """Lazily yields records for the consecutive secrets start to
+        start + count - 1, one point addition per key"""
+        return scan_range(
+            start, count, workers=workers, compressed=compressed, testnet=testnet
+        )
+
     def hex(self):
         return "{:x}".format(self.secret).zfill(64)
 
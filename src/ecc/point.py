@@ -4,9 +4,20 @@ from ecc.element import FieldElement, S256FieldElement, Gx, Gy
 from ecc.sign import Signature
 from ecc.utils import encode_base58_checksum, hash160
 from ecc.const import P, B, N, A
+from ecc.cache import LRUCache
+from ecc.jacobian import (
+    glv_multiply,
+    generator_multiply,
+    joint_multiply,
+    jacobian_add_affine,
+    to_jacobian,
+    from_jacobian,
+)
 
 
 class Point:
+    __slots__ = ("a", "b", "x", "y")
+
     def __init__(
         self,
         x: FieldElement | None,
@@ -102,7 +113,20 @@ class Point:
         return (p2.y - p1.y) / (p2.x - p1.x)
 
 
+# curve constants shared by every S256Point
+S256_A = S256FieldElement(A)
+S256_B = S256FieldElement(B)
+
+# number of parsed public keys kept by S256Point.parse_cache
+PARSE_CACHE_SIZE = 10000
+
+
 class S256Point(Point):
+    __slots__ = ()
+
+    # decompressed points keyed by SEC bytes, see parse
+    parse_cache = LRUCache(PARSE_CACHE_SIZE)
+
     def __init__(
         self,
         x: int | None,
@@ -110,15 +134,59 @@ class S256Point(Point):
         a: int = None,
         b: int = None,
     ) -> None:
-        a, b = S256FieldElement(A), S256FieldElement(B)
+        a, b = S256_A, S256_B
         if type(x) == int:
             super().__init__(x=S256FieldElement(x), y=S256FieldElement(y), a=a, b=b)
         else:
             super().__init__(x=x, y=y, a=a, b=b)
 
+    @classmethod
+    def _from_affine(cls, point: tuple[int, int] | None) -> Self:
+        """builds a point from the int coordinates computed by the internal
+        arithmetic, skipping the field range and on curve checks"""
+        result = object.__new__(cls)
+        result.a = S256_A
+        result.b = S256_B
+        if point is None:
+            result.x = result.y = None
+        else:
+            result.x = S256FieldElement._trusted(point[0])
+            result.y = S256FieldElement._trusted(point[1])
+
+        return result
+
+    def _affine(self) -> tuple[int, int] | None:
+        if self.x is None:
+            return None
+
+        return (self.x.num, self.y.num)
+
+    def __add__(self, other: Self) -> Self:
+        if not isinstance(other, S256Point):
+            return super().__add__(other)
+
+        total = jacobian_add_affine(to_jacobian(self._affine()), other._affine())
+        return self._from_affine(from_jacobian(total))
+
+    def __eq__(self, other: Self) -> bool:
+        if not isinstance(other, S256Point):
+            return super().__eq__(other)
+
+        return self._affine() == other._affine()
+
     def __rmul__(self, coefficient: int) -> Self:
         coef = coefficient % N
-        return super().__rmul__(coef)
+        if self.x is None or coef == 0:
+            return self._from_affine(None)
+
+        # scalar multiplication is done in Jacobian coordinates so only a
+        # single inversion is needed, when converting back to affine
+        if self.x.num == Gx.num and self.y.num == Gy.num:
+            result = generator_multiply(coef)
+        else:
+            result = glv_multiply(self._affine(), coef)
+
+        return self._from_affine(from_jacobian(result))
 
     def __repr__(self):
         if self.x is None:
@@ -126,11 +194,22 @@ class S256Point(Point):
         else:
             return "S256Point({}, {})".format(self.x, self.y)
 
+    def double_multiply(self, u: int, other: Self, v: int) -> Self:
+        """returns u * self + v * other, sharing the doublings of both
+        scalar multiplications (Strauss-Shamir)"""
+        result = joint_multiply(u % N, self._affine(), v % N, other._affine())
+        return self._from_affine(from_jacobian(result))
+
     def verify(self, z, sig: Signature) -> bool:
+        # signatures with r or s out of range can never be valid
+        if not (0 < sig.r < N and 0 < sig.s < N) or self.x is None:
+            return False
         s_inv = pow(sig.s, N - 2, N)
         u = z * s_inv % N
         v = sig.r * s_inv % N
-        total: Self = u * G + v * self
+        total: Self = G.double_multiply(u, self, v)
+        if total.x is None:
+            return False
         return total.x.num == sig.r
 
     def sec(self, compressed: bool = True) -> bytes:
@@ -149,9 +228,21 @@ class S256Point(Point):
         return b"\x04" + self.x.num.to_bytes(32, "big") + self.y.num.to_bytes(32, "big")
 
     @classmethod
-    def parse(self, sec_bin) -> Self:
-        """returns a S256Point object from a SEC(Standard Effecient Cryptography) binary (not hex)"""
+    def parse(cls, sec_bin) -> Self:
+        """returns a S256Point object from a SEC(Standard Effecient Cryptography) binary (not hex)
 
+        Results are kept in cls.parse_cache, so keys that show up again are
+        only decompressed and validated once"""
+        key = bytes(sec_bin)
+        point = cls.parse_cache.get(key)
+        if point is None:
+            point = cls._parse_sec(key)
+            cls.parse_cache.put(key, point)
+
+        return point
+
+    @classmethod
+    def _parse_sec(self, sec_bin) -> Self:
         # uncompressed format
         if sec_bin[0] == 4:
             x = S256FieldElement(int.from_bytes(sec_bin[1:33], "big"), P)
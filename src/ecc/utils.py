@@ -32,3 +32,23 @@ def encode_base58(s):
 def hash160(s):
     """sha256 followed by ripemd160"""
     return hashlib.new("ripemd160", hashlib.sha256(s).digest()).digest()
+
+
+def batch_inverse(values, modulus):
+    """Montgomery's trick, inverts every value with a single modular inversion
+    and about 3 multiplications per value"""
+    prefix = []
+    acc = 1
+    for value in values:
+        if value % modulus == 0:
+            raise ValueError(f"{value} is not invertible mod {modulus}")
+        prefix.append(acc)
+        acc = acc * value % modulus
+
+    acc_inv = pow(acc, -1, modulus)
+    result = [0] * len(prefix)
+    for i in range(len(prefix) - 1, -1, -1):
+        result[i] = prefix[i] * acc_inv % modulus
+        acc_inv = acc_inv * values[i] % modulus
+
+    return result
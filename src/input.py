@@ -9,32 +9,90 @@
 # modified, propagated, or distributed except according to the terms contained
 # in the LICENSE file.
 
-from utils import decode_varint, decode_uint32, format_hash
+from array import array
+
+from utils import decode_varint, decode_uint32, format_hash, varint_size
 from script import Script
 
 
 class Input(object):
     """Represents a transaction input"""
 
-    def __init__(self, raw_hex):
+    __slots__ = (
+        "_transaction_hash",
+        "_transaction_index",
+        "_script",
+        "_sequence_number",
+        "_value",
+        "_witnesses",
+        "_witness_offset",
+        "_buffer",
+        "_offset",
+        "_script_length",
+        "_script_start",
+        "size",
+    )
+
+    def __init__(self, raw_hex, offset=0, witness_offset=None):
         self._transaction_hash = None
         self._transaction_index = None
         self._script = None
         self._sequence_number = None
-        self._witnesses = []
+        # value of the spent output, not part of the input itself
+        self._value = None
+        # only set once witnesses are added by hand
+        self._witnesses = None
+
+        # offset of this input's witness stack in raw_hex for segwit
+        # transactions, witness items are read from the buffer on access
+        # instead of being copied and kept around
+        self._witness_offset = witness_offset
+
+        # raw_hex is shared with the parent transaction, only the offset of
+        # this input inside of it is recorded
+        self._buffer = raw_hex
+        self._offset = offset
 
-        self._script_length, varint_length = decode_varint(raw_hex[36:])
+        self._script_length, varint_length = decode_varint(raw_hex, offset + 36)
         self._script_start = 36 + varint_length
 
         self.size = self._script_start + self._script_length + 4
-        self.hex = raw_hex[: self.size]
 
     def add_witness(self, witness):
+        if self._witnesses is None:
+            self._witnesses = list(self.witnesses)
         self._witnesses.append(witness)
 
     @classmethod
-    def from_hex(cls, hex: bytes):
-        return cls(hex)
+    def from_hex(cls, hex: bytes, offset=0, witness_offset=None):
+        return cls(hex, offset, witness_offset)
+
+    def _slice(self, start, end):
+        return self._buffer[self._offset + start : self._offset + end]
+
+    @property
+    def hex(self):
+        """Returns the raw bytes of this input"""
+        return bytes(self._slice(0, self.size))
+
+    def serialize_into(self, writer):
+        """Writes the input, without its witnesses, to a ByteWriter"""
+        writer.write(self._slice(0, self.size))
+
+    def witness_size(self):
+        """Returns the serialized size of the input's witness stack"""
+        witnesses = self.witnesses
+        return varint_size(len(witnesses)) + sum(
+            varint_size(len(witness)) + len(witness) for witness in witnesses
+        )
+
+    def serialize_witness_into(self, writer):
+        """Writes the input's witness stack to a ByteWriter"""
+        witnesses = self.witnesses
+        writer.write_varint(len(witnesses))
+        for witness in witnesses:
+            writer.write_varint(len(witness))
+            writer.write(witness)
 
     def __repr__(self):
         return "Input(%s,%d)" % (self.transaction_hash, self.transaction_index)
@@ -44,7 +102,7 @@ class Input(object):
         """Returns the hash of the transaction containing the output
         redeemed by this input"""
         if self._transaction_hash is None:
-            self._transaction_hash = format_hash(self.hex[:32])
+            self._transaction_hash = format_hash(self._slice(0, 32))
         return self._transaction_hash
 
     @property
@@ -52,14 +110,20 @@ class Input(object):
         """Returns the index of the output inside the transaction that is
         redeemed by this input"""
         if self._transaction_index is None:
-            self._transaction_index = decode_uint32(self.hex[32:36])
+            self._transaction_index = decode_uint32(self._slice(32, 36))
         return self._transaction_index
 
+    @property
+    def outpoint(self):
+        """Returns the serialized outpoint, the previous transaction's hash
+        followed by the output index"""
+        return bytes(self._slice(0, 36))
+
     @property
     def sequence_number(self):
         """Returns the input's sequence number"""
         if self._sequence_number is None:
-            self._sequence_number = decode_uint32(self.hex[self.size - 4 : self.size])
+            self._sequence_number = decode_uint32(self._slice(self.size - 4, self.size))
         return self._sequence_number
 
     @property
@@ -67,14 +131,47 @@ class Input(object):
         """Returns a Script object representing the redeem script"""
         if self._script is None:
             end = self._script_start + self._script_length
-            self._script = Script.from_hex(self.hex[self._script_start : end])
+            self._script = Script.from_hex(bytes(self._slice(self._script_start, end)))
         return self._script
 
+    def witness_table(self):
+        """Returns the (offset, length) pairs of the witness items inside of
+        the transaction buffer, flattened into an array"""
+        table = array("Q")
+        if self._witness_offset is None:
+            return table
+
+        cursor = self._witness_offset
+        n_witnesses, varint_size = decode_varint(self._buffer, cursor)
+        cursor += varint_size
+        for i in range(n_witnesses):
+            length, varint_size = decode_varint(self._buffer, cursor)
+            cursor += varint_size
+            table.append(cursor)
+            table.append(length)
+            cursor += length
+        return table
+
     @property
     def witnesses(self):
-        """Return a list of witness data attached to this input, empty if non segwit"""
-        return self._witnesses
+        """Return a tuple of witness data attached to this input, empty if non
+        segwit. It is read only, witnesses are added with add_witness"""
+        if self._witnesses is not None:
+            return tuple(self._witnesses)
+
+        table = self.witness_table()
+        return tuple(
+            bytes(self._buffer[table[i] : table[i] + table[i + 1]])
+            for i in range(0, len(table), 2)
+        )
 
     @property
-    def value(self) -> int:
-        pass
+    def value(self) -> int | None:
+        """Returns the value in satoshis of the output spent by this input.
+        It is not part of the transaction, so it is None until looked up,
+        e.g. by UTXOSet.fill_values"""
+        return self._value
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self._value = value
@@ -0,0 +1,640 @@
+"""Script interpreter for validating transaction inputs
+
+Interpreter runs an input's scriptSig, the scriptPubKey of the output it
+spends and, for segwit, its witness through a stack machine. It covers
+p2pk, p2pkh, bare multisig, p2sh, p2wpkh and p2wsh spends and the opcodes
+their scripts use. Signatures must be strict DER (BIP66), timelocks and
+taproot spends are not enforced.
+
+Signature checks never call S256Point.verify directly, they go through
+the `verify` callback given to the Interpreter, verify(sec, der, z) -> bool.
+The default verify_signature parses and checks every signature, a caching
+or batching verifier can be passed in its place without touching the
+script logic. Signature hashes come from a TransactionSighash shared by
+all inputs of the transaction.
+"""
+
+import hashlib
+from typing import Callable
+
+from ecc.point import S256Point
+from ecc.sign import Signature
+from ecc.utils import hash160
+from script import (
+    Script,
+    tokenize,
+    OP_0,
+    OP_1NEGATE,
+    OP_1,
+    OP_16,
+    OP_RETURN,
+    OP_DUP,
+    OP_EQUAL,
+    OP_EQUALVERIFY,
+    OP_HASH160,
+    OP_CHECKSIG,
+    OP_CHECKMULTISIG,
+)
+from sighash import TransactionSighash
+from utils import double_sha256
+
+
+OP_NOP = 0x61
+OP_IF = 0x63
+OP_NOTIF = 0x64
+OP_ELSE = 0x67
+OP_ENDIF = 0x68
+OP_VERIFY = 0x69
+OP_TOALTSTACK = 0x6B
+OP_FROMALTSTACK = 0x6C
+OP_2DROP = 0x6D
+OP_2DUP = 0x6E
+OP_3DUP = 0x6F
+OP_2OVER = 0x70
+OP_2ROT = 0x71
+OP_2SWAP = 0x72
+OP_IFDUP = 0x73
+OP_DEPTH = 0x74
+OP_DROP = 0x75
+OP_NIP = 0x77
+OP_OVER = 0x78
+OP_PICK = 0x79
+OP_ROLL = 0x7A
+OP_ROT = 0x7B
+OP_SWAP = 0x7C
+OP_TUCK = 0x7D
+OP_SIZE = 0x82
+OP_1ADD = 0x8B
+OP_1SUB = 0x8C
+OP_NEGATE = 0x8F
+OP_ABS = 0x90
+OP_NOT = 0x91
+OP_0NOTEQUAL = 0x92
+OP_ADD = 0x93
+OP_SUB = 0x94
+OP_BOOLAND = 0x9A
+OP_BOOLOR = 0x9B
+OP_NUMEQUAL = 0x9C
+OP_NUMEQUALVERIFY = 0x9D
+OP_NUMNOTEQUAL = 0x9E
+OP_LESSTHAN = 0x9F
+OP_GREATERTHAN = 0xA0
+OP_LESSTHANOREQUAL = 0xA1
+OP_GREATERTHANOREQUAL = 0xA2
+OP_MIN = 0xA3
+OP_MAX = 0xA4
+OP_WITHIN = 0xA5
+OP_RIPEMD160 = 0xA6
+OP_SHA1 = 0xA7
+OP_SHA256 = 0xA8
+OP_HASH256 = 0xAA
+OP_CODESEPARATOR = 0xAB
+OP_CHECKSIGVERIFY = 0xAD
+OP_CHECKMULTISIGVERIFY = 0xAF
+OP_CHECKLOCKTIMEVERIFY = 0xB1
+OP_CHECKSEQUENCEVERIFY = 0xB2
+
+# consensus limits
+MAX_SCRIPT_SIZE = 10000
+MAX_ELEMENT_SIZE = 520
+MAX_OPS_PER_SCRIPT = 201
+MAX_STACK_SIZE = 1000
+MAX_PUBKEYS_PER_MULTISIG = 20
+
+# signature hash versions
+SIGVERSION_BASE = 0
+SIGVERSION_WITNESS_V0 = 1
+
+
+class ScriptError(Exception):
+    """Raised when a script fails to validate"""
+
+
+def verify_signature(sec: bytes, der: bytes, z: int) -> bool:
+    """Default signature check, parses the public key and the DER signature
+    and verifies the signature against the message z. Keys or signatures
+    that fail to parse are reported as invalid signatures"""
+    try:
+        point = S256Point.parse(sec)
+        sig = Signature.parse(der)
+    except Exception:
+        return False
+    return point.verify(z, sig)
+
+
+def is_strict_der(sig: bytes) -> bool:
+    """Returns whether a signature with its trailing hash type byte is
+    strictly DER encoded, as BIP66 requires
+
+        0x30 len 0x02 len(r) r 0x02 len(s) s hash_type
+
+    with r and s minimal, positive big endian integers"""
+    if not 9 <= len(sig) <= 73:
+        return False
+    if sig[0] != 0x30 or sig[1] != len(sig) - 3:
+        return False
+
+    len_r = sig[3]
+    if 5 + len_r >= len(sig):
+        return False
+    len_s = sig[5 + len_r]
+    if len_r + len_s + 7 != len(sig):
+        return False
+
+    for start, length in ((4, len_r), (6 + len_r, len_s)):
+        if sig[start - 2] != 0x02 or length == 0:
+            return False
+        # negative numbers and needless leading zeros are not allowed
+        if sig[start] & 0x80:
+            return False
+        if length > 1 and sig[start] == 0 and not sig[start + 1] & 0x80:
+            return False
+    return True
+
+
+def encode_num(num: int) -> bytes:
+    """Encodes an int as a minimal little endian script number"""
+    if num == 0:
+        return b""
+    abs_num = abs(num)
+    result = bytearray()
+    while abs_num:
+        result.append(abs_num & 0xFF)
+        abs_num >>= 8
+    # the top bit of the last byte is the sign bit
+    if result[-1] & 0x80:
+        result.append(0x80 if num < 0 else 0x00)
+    elif num < 0:
+        result[-1] |= 0x80
+    return bytes(result)
+
+
+def decode_num(element: bytes, max_size: int = 4) -> int:
+    """Decodes a little endian script number of at most max_size bytes"""
+    if len(element) > max_size:
+        raise ScriptError(f"Script number of {len(element)} bytes overflows")
+    if not element:
+        return 0
+    num = int.from_bytes(element, "little")
+    sign_bit = 0x80 << (8 * (len(element) - 1))
+    if num & sign_bit:
+        return -(num & ~sign_bit)
+    return num
+
+
+def cast_to_bool(element: bytes) -> bool:
+    """Any non zero element is true, negative zero included as false"""
+    for i, byte in enumerate(element):
+        if byte:
+            # 0x80 as the last byte alone is negative zero
+            return not (i == len(element) - 1 and byte == 0x80)
+    return False
+
+
+def is_push_only(operations: list[int | bytes]) -> bool:
+    return all(
+        isinstance(op, bytes) or op == OP_0 or op == OP_1NEGATE or OP_1 <= op <= OP_16
+        for op in operations
+    )
+
+
+def p2pkh_script(h160: bytes) -> bytes:
+    """Returns the p2pkh script paying to a hash160, the script code of
+    p2wpkh spends"""
+    return b"\x76\xa9\x14" + h160 + b"\x88\xac"
+
+
+_TRUE = b"\x01"
+_FALSE = b""
+
+# opcodes that are disabled and fail the script even when not executed
+_DISABLED = {0x7E, 0x7F, 0x80, 0x81, 0x83, 0x84, 0x85, 0x86}
+_DISABLED.update({0x8D, 0x8E, 0x95, 0x96, 0x97, 0x98, 0x99})
+
+_UNARY = {
+    OP_1ADD: lambda a: a + 1,
+    OP_1SUB: lambda a: a - 1,
+    OP_NEGATE: lambda a: -a,
+    OP_ABS: abs,
+    OP_NOT: lambda a: int(a == 0),
+    OP_0NOTEQUAL: lambda a: int(a != 0),
+}
+
+_BINARY = {
+    OP_ADD: lambda a, b: a + b,
+    OP_SUB: lambda a, b: a - b,
+    OP_BOOLAND: lambda a, b: int(a != 0 and b != 0),
+    OP_BOOLOR: lambda a, b: int(a != 0 or b != 0),
+    OP_NUMEQUAL: lambda a, b: int(a == b),
+    OP_NUMEQUALVERIFY: lambda a, b: int(a == b),
+    OP_NUMNOTEQUAL: lambda a, b: int(a != b),
+    OP_LESSTHAN: lambda a, b: int(a < b),
+    OP_GREATERTHAN: lambda a, b: int(a > b),
+    OP_LESSTHANOREQUAL: lambda a, b: int(a <= b),
+    OP_GREATERTHANOREQUAL: lambda a, b: int(a >= b),
+    OP_MIN: min,
+    OP_MAX: max,
+}
+
+_HASHES = {
+    OP_RIPEMD160: lambda b: hashlib.new("ripemd160", b).digest(),
+    OP_SHA1: lambda b: hashlib.sha1(b).digest(),
+    OP_SHA256: lambda b: hashlib.sha256(b).digest(),
+    OP_HASH160: hash160,
+    OP_HASH256: double_sha256,
+}
+
+
+class Interpreter:
+    """Validates the inputs of a transaction.
+
+    verify is called as verify(sec, der, z) for every signature check and
+    must return a bool. The signature hashes of all inputs share one
+    TransactionSighash, so the transaction wide parts of BIP143 hashing are
+    only computed once however many inputs are checked."""
+
+    def __init__(
+        self,
+        tx,
+        verify: Callable[[bytes, bytes, int], bool] = verify_signature,
+    ) -> None:
+        self.tx = tx
+        self.verify = verify
+        self.sighash = TransactionSighash(tx)
+
+    def verify_input(self, index: int, script_pubkey: bytes, amount: int = None):
+        """Returns whether the input at index validly spends an output with
+        the given scriptPubKey. amount is the output's value, needed for
+        segwit spends"""
+        try:
+            self.check_input(index, script_pubkey, amount)
+        except ScriptError:
+            return False
+        return True
+
+    def check_input(self, index: int, script_pubkey: bytes, amount: int = None):
+        """Same as verify_input, but raises a ScriptError describing why the
+        input is invalid"""
+        tx_in = self.tx.inputs[index]
+        script_sig = tx_in.script.bytes
+        witnesses = tx_in.witnesses
+        script_pubkey = bytes(script_pubkey)
+        spent = Script(script_pubkey)
+
+        sig_operations = self._tokenize(script_sig)
+        if not is_push_only(sig_operations) and spent.is_p2sh():
+            raise ScriptError("scriptSig of a p2sh spend is not push only")
+
+        stack = []
+        self.evaluate(sig_operations, stack, index, script_sig)
+        p2sh_stack = list(stack)
+        self.evaluate(self._tokenize(script_pubkey), stack, index, script_pubkey)
+        self._check_result(stack)
+
+        program = spent
+        if spent.is_p2sh():
+            # the last push of the scriptSig is the redeem script
+            redeem_script = p2sh_stack.pop()
+            stack = p2sh_stack
+            self.evaluate(self._tokenize(redeem_script), stack, index, redeem_script)
+            self._check_result(stack)
+            program = Script(redeem_script)
+            if self._witness_version(program) is not None and script_sig != bytes(
+                [len(redeem_script)]
+            ) + redeem_script:
+                raise ScriptError("scriptSig of a nested segwit spend is malleated")
+
+        version = self._witness_version(program)
+        if version is not None:
+            if program is spent and script_sig:
+                raise ScriptError("scriptSig of a native segwit spend is not empty")
+            self._check_witness(index, version, program.bytes[2:], witnesses, amount)
+        elif witnesses:
+            raise ScriptError("Witness given for a non segwit spend")
+
+    def _check_witness(self, index, version, program, witnesses, amount):
+        if version != 0:
+            if version == 1 and len(program) == 32:
+                raise ScriptError("Taproot spends are not supported")
+            # unknown witness versions are left for future soft forks
+            return
+
+        if amount is None:
+            raise ScriptError("Segwit spends need the amount of the spent output")
+
+        if len(program) == 20:
+            if len(witnesses) != 2:
+                raise ScriptError("p2wpkh witness must be a signature and a key")
+            script_code = p2pkh_script(program)
+            stack = list(witnesses)
+        elif len(program) == 32:
+            if not witnesses:
+                raise ScriptError("p2wsh witness is empty")
+            script_code = witnesses[-1]
+            if hashlib.sha256(script_code).digest() != program:
+                raise ScriptError("Witness script does not match the p2wsh program")
+            stack = list(witnesses[:-1])
+        else:
+            raise ScriptError(f"Witness program of {len(program)} bytes")
+
+        if any(len(element) > MAX_ELEMENT_SIZE for element in stack):
+            raise ScriptError("Witness element is too large")
+
+        operations = self._tokenize(script_code)
+        self.evaluate(operations, stack, index, script_code, amount, SIGVERSION_WITNESS_V0)
+        if len(stack) != 1:
+            raise ScriptError("Witness script must leave exactly one element")
+        self._check_result(stack)
+
+    @staticmethod
+    def _witness_version(script: Script) -> int | None:
+        b = script.bytes
+        if not 4 <= len(b) <= 42 or b[1] != len(b) - 2:
+            return None
+        if b[0] == OP_0:
+            return 0
+        if OP_1 <= b[0] <= OP_16:
+            return b[0] - OP_1 + 1
+        return None
+
+    @staticmethod
+    def _tokenize(script: bytes) -> list[int | bytes]:
+        if len(script) > MAX_SCRIPT_SIZE:
+            raise ScriptError("Script is too large")
+        try:
+            return tokenize(script)
+        except ValueError as e:
+            raise ScriptError(str(e))
+
+    @staticmethod
+    def _check_result(stack):
+        if not stack or not cast_to_bool(stack[-1]):
+            raise ScriptError("Script evaluated to false")
+
+    def evaluate(
+        self,
+        operations: list[int | bytes],
+        stack: list[bytes],
+        index: int,
+        script_code: bytes,
+        amount: int = None,
+        sig_version: int = SIGVERSION_BASE,
+    ) -> list[bytes]:
+        """Runs the operations on the stack, in place. script_code is the
+        script being run, signatures in it commit to it. Raises a
+        ScriptError as soon as the script fails"""
+        altstack = []
+        # one entry per open OP_IF, whether its branch is being executed
+        conditions = []
+        op_count = 0
+
+        for op in operations:
+            executing = all(conditions)
+
+            if isinstance(op, bytes):
+                if len(op) > MAX_ELEMENT_SIZE:
+                    raise ScriptError("Push exceeds the maximum element size")
+                if executing:
+                    stack.append(op)
+                    if len(stack) + len(altstack) > MAX_STACK_SIZE:
+                        raise ScriptError("Stack size limit exceeded")
+                continue
+
+            if op > OP_16:
+                op_count += 1
+                if op_count > MAX_OPS_PER_SCRIPT:
+                    raise ScriptError("Too many operations")
+            if op in _DISABLED:
+                raise ScriptError(f"Disabled opcode {op:#x}")
+
+            if op in (OP_IF, OP_NOTIF):
+                value = False
+                if executing:
+                    if not stack:
+                        raise ScriptError("OP_IF on an empty stack")
+                    value = cast_to_bool(stack.pop())
+                    if op == OP_NOTIF:
+                        value = not value
+                conditions.append(value)
+                continue
+            if op == OP_ELSE:
+                if not conditions:
+                    raise ScriptError("OP_ELSE without OP_IF")
+                conditions[-1] = not conditions[-1]
+                continue
+            if op == OP_ENDIF:
+                if not conditions:
+                    raise ScriptError("OP_ENDIF without OP_IF")
+                conditions.pop()
+                continue
+
+            if not executing:
+                continue
+
+            op_count = self._execute(
+                op, stack, altstack, op_count, index, script_code, amount, sig_version
+            )
+            if len(stack) + len(altstack) > MAX_STACK_SIZE:
+                raise ScriptError("Stack size limit exceeded")
+
+        if conditions:
+            raise ScriptError("Unbalanced OP_IF")
+        return stack
+
+    def _execute(
+        self, op, stack, altstack, op_count, index, script_code, amount, sig_version
+    ) -> int:
+        """Runs a single opcode, returns the script's updated op count"""
+
+        def pop(n=1):
+            if len(stack) < n:
+                raise ScriptError(f"Opcode {op:#x} needs {n} stack elements")
+            items = stack[-n:]
+            del stack[-n:]
+            return items
+
+        if op == OP_0:
+            stack.append(_FALSE)
+        elif op == OP_1NEGATE:
+            stack.append(encode_num(-1))
+        elif OP_1 <= op <= OP_16:
+            stack.append(bytes([op - OP_1 + 1]))
+        elif op in (OP_NOP, OP_CODESEPARATOR) or 0xB0 <= op <= 0xB9:
+            # OP_NOPs, OP_CHECKLOCKTIMEVERIFY and OP_CHECKSEQUENCEVERIFY
+            # are not enforced
+            pass
+        elif op == OP_RETURN:
+            raise ScriptError("OP_RETURN")
+        elif op == OP_VERIFY:
+            (top,) = pop()
+            if not cast_to_bool(top):
+                raise ScriptError("OP_VERIFY failed")
+        elif op == OP_TOALTSTACK:
+            altstack.extend(pop())
+        elif op == OP_FROMALTSTACK:
+            if not altstack:
+                raise ScriptError("OP_FROMALTSTACK on an empty altstack")
+            stack.append(altstack.pop())
+        elif op == OP_DUP:
+            (top,) = pop()
+            stack += [top, top]
+        elif op == OP_2DUP:
+            stack += pop(2) * 2
+        elif op == OP_3DUP:
+            stack += pop(3) * 2
+        elif op == OP_2OVER:
+            items = pop(4)
+            stack += items + items[:2]
+        elif op == OP_2ROT:
+            items = pop(6)
+            stack += items[2:] + items[:2]
+        elif op == OP_2SWAP:
+            items = pop(4)
+            stack += items[2:] + items[:2]
+        elif op in (OP_PICK, OP_ROLL):
+            n = decode_num(pop()[0])
+            if not 0 <= n < len(stack):
+                raise ScriptError(f"Opcode {op:#x} index {n} out of range")
+            item = stack[-n - 1]
+            if op == OP_ROLL:
+                del stack[-n - 1]
+            stack.append(item)
+        elif op == OP_IFDUP:
+            (top,) = pop()
+            stack += [top, top] if cast_to_bool(top) else [top]
+        elif op == OP_DEPTH:
+            stack.append(encode_num(len(stack)))
+        elif op == OP_DROP:
+            pop()
+        elif op == OP_2DROP:
+            pop(2)
+        elif op == OP_NIP:
+            a, b = pop(2)
+            stack.append(b)
+        elif op == OP_OVER:
+            a, b = pop(2)
+            stack += [a, b, a]
+        elif op == OP_ROT:
+            a, b, c = pop(3)
+            stack += [b, c, a]
+        elif op == OP_SWAP:
+            a, b = pop(2)
+            stack += [b, a]
+        elif op == OP_TUCK:
+            a, b = pop(2)
+            stack += [b, a, b]
+        elif op == OP_SIZE:
+            (top,) = pop()
+            stack += [top, encode_num(len(top))]
+        elif op in (OP_EQUAL, OP_EQUALVERIFY):
+            a, b = pop(2)
+            if op == OP_EQUALVERIFY:
+                if a != b:
+                    raise ScriptError("OP_EQUALVERIFY failed")
+            else:
+                stack.append(_TRUE if a == b else _FALSE)
+        elif op in _UNARY:
+            (a,) = pop()
+            stack.append(encode_num(_UNARY[op](decode_num(a))))
+        elif op in _BINARY:
+            a, b = pop(2)
+            result = _BINARY[op](decode_num(a), decode_num(b))
+            if op == OP_NUMEQUALVERIFY:
+                if not result:
+                    raise ScriptError("OP_NUMEQUALVERIFY failed")
+            else:
+                stack.append(encode_num(result))
+        elif op == OP_WITHIN:
+            x, low, high = (decode_num(item) for item in pop(3))
+            stack.append(_TRUE if low <= x < high else _FALSE)
+        elif op in _HASHES:
+            (top,) = pop()
+            stack.append(_HASHES[op](top))
+        elif op in (OP_CHECKSIG, OP_CHECKSIGVERIFY):
+            sig, sec = pop(2)
+            valid = self.check_signature(sig, sec, index, script_code, amount, sig_version)
+            if op == OP_CHECKSIGVERIFY:
+                if not valid:
+                    raise ScriptError("OP_CHECKSIGVERIFY failed")
+            else:
+                stack.append(_TRUE if valid else _FALSE)
+        elif op in (OP_CHECKMULTISIG, OP_CHECKMULTISIGVERIFY):
+            valid, op_count = self._check_multisig(
+                pop, op_count, index, script_code, amount, sig_version
+            )
+            if op == OP_CHECKMULTISIGVERIFY:
+                if not valid:
+                    raise ScriptError("OP_CHECKMULTISIGVERIFY failed")
+            else:
+                stack.append(_TRUE if valid else _FALSE)
+        else:
+            raise ScriptError(f"Unsupported opcode {op:#x}")
+        return op_count
+
+    def _check_multisig(self, pop, op_count, index, script_code, amount, sig_version):
+        n = decode_num(pop()[0])
+        if not 0 <= n <= MAX_PUBKEYS_PER_MULTISIG:
+            raise ScriptError(f"Invalid multisig key count {n}")
+        # every key counts towards the script's operation limit
+        op_count += n
+        if op_count > MAX_OPS_PER_SCRIPT:
+            raise ScriptError("Too many operations")
+        keys = pop(n) if n else []
+        m = decode_num(pop()[0])
+        if not 0 <= m <= n:
+            raise ScriptError(f"Invalid multisig signature count {m}")
+        sigs = pop(m) if m else []
+
+        # the extra element consumed by the original off by one bug, it must
+        # be empty
+        (dummy,) = pop()
+        if dummy:
+            raise ScriptError("OP_CHECKMULTISIG dummy element is not empty")
+
+        # signatures must appear in the same order as their keys, so every
+        # key is tried at most once
+        key_index = 0
+        for sig in sigs:
+            while key_index < len(keys):
+                sec = keys[key_index]
+                key_index += 1
+                if self.check_signature(
+                    sig, sec, index, script_code, amount, sig_version
+                ):
+                    break
+            else:
+                return False, op_count
+        return True, op_count
+
+    def check_signature(
+        self,
+        sig: bytes,
+        sec: bytes,
+        index: int,
+        script_code: bytes,
+        amount: int = None,
+        sig_version: int = SIGVERSION_BASE,
+    ) -> bool:
+        """Checks a signature with its trailing hash type byte against a SEC
+        public key, through the verify callback"""
+        if not sig:
+            return False
+        if not is_strict_der(sig):
+            raise ScriptError("Signature is not strict DER")
+        hash_type = sig[-1]
+        if sig_version == SIGVERSION_WITNESS_V0:
+            z = self.sighash.segwit_v0(index, script_code, amount, hash_type)
+        else:
+            z = self.sighash.legacy(index, script_code, hash_type)
+        return self.verify(sec, sig[:-1], z)
+
+
+def verify_input(
+    tx,
+    index: int,
+    script_pubkey: bytes,
+    amount: int = None,
+    verify: Callable[[bytes, bytes, int], bool] = verify_signature,
+) -> bool:
+    """Returns whether a single input of tx validly spends its output"""
+    return Interpreter(tx, verify).verify_input(index, script_pubkey, amount)
@@ -10,28 +10,52 @@
 # in the LICENSE file.
 
 from utils import decode_varint, decode_uint64
-from script import Script
+from script import Script, decode_small_int
 from address import Address
 
 
 class Output(object):
     """Represents a Transaction output"""
 
-    def __init__(self, raw_hex):
+    __slots__ = (
+        "_value",
+        "_script",
+        "_addresses",
+        "_buffer",
+        "_offset",
+        "_script_start",
+        "size",
+    )
+
+    def __init__(self, raw_hex, offset=0):
         self._value = None
         self._script = None
         self._addresses = None
 
-        script_length, varint_size = decode_varint(raw_hex[8:])
-        script_start = 8 + varint_size
+        # raw_hex is shared with the parent transaction, only the offset of
+        # this output inside of it is recorded
+        self._buffer = raw_hex
+        self._offset = offset
 
-        self._script_hex = raw_hex[script_start : script_start + script_length]
-        self.size = script_start + script_length
-        self._value_hex = raw_hex[:8]
+        script_length, varint_size = decode_varint(raw_hex, offset + 8)
+        self._script_start = 8 + varint_size
+        self.size = self._script_start + script_length
 
     @classmethod
-    def from_hex(cls, hex_):
-        return cls(hex_)
+    def from_hex(cls, hex_, offset=0):
+        return cls(hex_, offset)
+
+    def _slice(self, start, end):
+        return self._buffer[self._offset + start : self._offset + end]
+
+    @property
+    def hex(self):
+        """Returns the raw bytes of this output"""
+        return bytes(self._slice(0, self.size))
+
+    def serialize_into(self, writer):
+        """Writes the output to a ByteWriter"""
+        writer.write(self._slice(0, self.size))
 
     def __repr__(self):
         return "Output(satoshis=%d)" % self.value
@@ -40,14 +64,15 @@ class Output(object):
     def value(self):
         """Returns the value of the output expressed in satoshis"""
         if self._value is None:
-            self._value = decode_uint64(self._value_hex)
+            self._value = decode_uint64(self._slice(0, 8))
         return self._value
 
     @property
     def script(self):
         """Returns the output's script as a Script object"""
         if self._script is None:
-            self._script = Script.from_hex(self._script_hex)
+            script_hex = bytes(self._slice(self._script_start, self.size))
+            self._script = Script.from_hex(script_hex)
         return self._script
 
     @property
@@ -67,7 +92,7 @@ class Output(object):
                 address = Address.from_ripemd160(self.script.operations[1], type="p2sh")
                 self._addresses.append(address)
             elif self.type == "multisig":
-                n = self.script.operations[-2]
+                n = decode_small_int(self.script.operations[-2])
                 for operation in self.script.operations[1 : 1 + n]:
                     self._addresses.append(Address.from_public_key(operation))
             elif self.type == "p2wpkh":
@@ -103,32 +128,10 @@ class Output(object):
     def is_p2wsh(self):
         return self.script.is_p2wsh()
 
+    def is_p2tr(self):
+        return self.script.is_p2tr()
+
     @property
     def type(self):
         """Returns the output's script type as a string"""
-        # Fix for issue 11
-        if not self.script.script.is_valid():
-            return "invalid"
-
-        if self.is_pubkeyhash():
-            return "pubkeyhash"
-
-        if self.is_pubkey():
-            return "pubkey"
-
-        if self.is_p2sh():
-            return "p2sh"
-
-        if self.is_multisig():
-            return "multisig"
-
-        if self.is_return():
-            return "OP_RETURN"
-
-        if self.is_p2wpkh():
-            return "p2wpkh"
-
-        if self.is_p2wsh():
-            return "p2wsh"
-
-        return "unknown"
+        return self.script.type
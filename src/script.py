@@ -2,9 +2,75 @@ from typing import Self
 from utils import read_varint, encode_varint
 
 
+OP_0 = 0x00
+OP_PUSHDATA1 = 0x4C
+OP_PUSHDATA2 = 0x4D
+OP_PUSHDATA4 = 0x4E
+OP_1NEGATE = 0x4F
+OP_1 = 0x51
+OP_16 = 0x60
+OP_RETURN = 0x6A
+OP_DUP = 0x76
+OP_EQUAL = 0x87
+OP_EQUALVERIFY = 0x88
+OP_HASH160 = 0xA9
+OP_CHECKSIG = 0xAC
+OP_CHECKMULTISIG = 0xAE
+
+
+def decode_small_int(op: int) -> int:
+    """returns the number pushed by OP_0, OP_1 ... OP_16"""
+    if op == OP_0:
+        return 0
+    if OP_1 <= op <= OP_16:
+        return op - OP_1 + 1
+    raise ValueError(f"Opcode {op} is not a small integer")
+
+
+def tokenize(script: bytes) -> list[int | bytes]:
+    """Splits a raw script into its operations, data pushes become bytes and
+    every other opcode is kept as an int"""
+    operations = []
+    length = len(script)
+    i = 0
+    while i < length:
+        op = script[i]
+        i += 1
+        if OP_0 < op < OP_PUSHDATA1:
+            size = op
+        elif op == OP_PUSHDATA1:
+            size = int.from_bytes(script[i : i + 1], "little")
+            i += 1
+        elif op == OP_PUSHDATA2:
+            size = int.from_bytes(script[i : i + 2], "little")
+            i += 2
+        elif op == OP_PUSHDATA4:
+            size = int.from_bytes(script[i : i + 4], "little")
+            i += 4
+        else:
+            operations.append(op)
+            continue
+
+        if i + size > length:
+            raise ValueError(f"Push of {size} bytes past the end of the script")
+
+        operations.append(bytes(script[i : i + size]))
+        i += size
+
+    return operations
+
+
 class Script:
     def __init__(self, bytes: bytes) -> None:
         self.bytes = bytes
+        self._operations = None
+        self._type = None
+
+    def __repr__(self) -> str:
+        return f"Script({self.bytes.hex()})"
+
+    def __len__(self) -> int:
+        return len(self.bytes)
 
     def serialize(self) -> bytes:
         result = encode_varint(len(self.bytes))
@@ -19,3 +85,139 @@ class Script:
         script_sig = stream.read(script_sig_len)
 
         return cls(script_sig)
+
+    @classmethod
+    def from_hex(cls, hex: bytes) -> Self:
+        return cls(hex)
+
+    @property
+    def operations(self) -> list[int | bytes]:
+        """Returns the script's operations, tokenized on first access"""
+        if self._operations is None:
+            self._operations = tokenize(self.bytes)
+        return self._operations
+
+    def is_valid(self) -> bool:
+        """Returns whether every push of the script is complete"""
+        try:
+            self.operations
+        except ValueError:
+            return False
+        return True
+
+    # the standard templates below are recognized from their length and
+    # fixed bytes alone, without tokenizing the script
+
+    def is_pubkeyhash(self) -> bool:
+        """OP_DUP OP_HASH160 <20 bytes> OP_EQUALVERIFY OP_CHECKSIG"""
+        b = self.bytes
+        return (
+            len(b) == 25
+            and b[0] == OP_DUP
+            and b[1] == OP_HASH160
+            and b[2] == 20
+            and b[23] == OP_EQUALVERIFY
+            and b[24] == OP_CHECKSIG
+        )
+
+    def is_p2pkh(self) -> bool:
+        return self.is_pubkeyhash()
+
+    def is_pubkey(self) -> bool:
+        """<33 or 65 byte public key> OP_CHECKSIG"""
+        b = self.bytes
+        if len(b) == 35:
+            key_length = 33
+        elif len(b) == 67:
+            key_length = 65
+        else:
+            return False
+        return b[0] == key_length and b[-1] == OP_CHECKSIG
+
+    def is_p2sh(self) -> bool:
+        """OP_HASH160 <20 bytes> OP_EQUAL"""
+        b = self.bytes
+        return len(b) == 23 and b[0] == OP_HASH160 and b[1] == 20 and b[22] == OP_EQUAL
+
+    def is_p2wpkh(self) -> bool:
+        """OP_0 <20 bytes>"""
+        b = self.bytes
+        return len(b) == 22 and b[0] == OP_0 and b[1] == 20
+
+    def is_p2wsh(self) -> bool:
+        """OP_0 <32 bytes>"""
+        b = self.bytes
+        return len(b) == 34 and b[0] == OP_0 and b[1] == 32
+
+    def is_p2tr(self) -> bool:
+        """OP_1 <32 bytes>"""
+        b = self.bytes
+        return len(b) == 34 and b[0] == OP_1 and b[1] == 32
+
+    def is_return(self) -> bool:
+        """OP_RETURN followed by anything"""
+        return len(self.bytes) > 0 and self.bytes[0] == OP_RETURN
+
+    def is_multisig(self) -> bool:
+        """OP_m <public key> ... OP_n OP_CHECKMULTISIG"""
+        b = self.bytes
+        # cheap byte checks first, only then tokenize
+        if len(b) < 37 or b[-1] != OP_CHECKMULTISIG:
+            return False
+        if not (OP_1 <= b[0] <= OP_16 and OP_1 <= b[-2] <= OP_16):
+            return False
+        if not self.is_valid():
+            return False
+
+        operations = self.operations
+        if not isinstance(operations[-2], int):
+            return False
+
+        m = decode_small_int(operations[0])
+        n = decode_small_int(operations[-2])
+        keys = operations[1:-2]
+        return (
+            m <= n == len(keys)
+            and all(isinstance(key, bytes) and len(key) in (33, 65) for key in keys)
+        )
+
+    def is_unknown(self) -> bool:
+        return self.type == "unknown"
+
+    @property
+    def type(self) -> str:
+        """Returns the script's standard template name"""
+        if self._type is None:
+            self._type = self._classify()
+        return self._type
+
+    def _classify(self) -> str:
+        if self.is_pubkeyhash():
+            return "pubkeyhash"
+
+        if self.is_p2sh():
+            return "p2sh"
+
+        if self.is_p2wpkh():
+            return "p2wpkh"
+
+        if self.is_p2wsh():
+            return "p2wsh"
+
+        if self.is_p2tr():
+            return "p2tr"
+
+        if self.is_pubkey():
+            return "pubkey"
+
+        if self.is_return():
+            return "OP_RETURN"
+
+        if self.is_multisig():
+            return "multisig"
+
+        # Fix for issue 11
+        if not self.is_valid():
+            return "invalid"
+
+        return "unknown"
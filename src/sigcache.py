@@ -0,0 +1,125 @@
+"""Cache of verified signatures
+
+The same signature is usually verified more than once: when its
+transaction enters the mempool, again when it is mined in a block, and
+again if that block is re-validated after a reorg. SignatureCache remembers
+every (sighash, public key, signature) triple that verified, so repeats cost
+one sha256 instead of an elliptic curve multiplication.
+
+Entries are the sha256 of the triple prefixed with a random per cache salt.
+Every entry is the same 32 bytes, and nobody outside the process can
+predict which keys collide or get evicted. Only valid signatures are
+stored, an invalid one is always verified again.
+
+A SignatureCache is a verify(sec, der, z) callable, so it drops straight
+into the Interpreter:
+
+    sigcache = SignatureCache()
+    Interpreter(tx, verify=sigcache).verify_input(0, script_pubkey)
+"""
+
+import hashlib
+import os
+from typing import Callable
+
+from ecc.cache import LRUCache, RandomCache
+from interpreter import verify_signature
+
+
+# entries kept by default, about 8MB of cache keys and dict overhead
+DEFAULT_SIGCACHE_SIZE = 50000
+
+EVICTION_POLICIES = {"lru": LRUCache, "random": RandomCache}
+
+
+class SignatureCache:
+    """Bounded, thread safe cache in front of signature verification.
+
+    eviction is "lru" to drop the least recently used entry when full, or
+    "random" to drop a random one, which makes hits cheaper and is what
+    Bitcoin Core does. verify is the check run on a miss. hits, misses,
+    evictions and hit_rate() report how well the cache is doing"""
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_SIGCACHE_SIZE,
+        eviction: str = "random",
+        verify: Callable[[bytes, bytes, int], bool] = verify_signature,
+        salt: bytes = None,
+    ) -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {eviction}")
+
+        self.eviction = eviction
+        self._cache = EVICTION_POLICIES[eviction](maxsize)
+        self._verify = verify
+        self._salt = os.urandom(32) if salt is None else salt
+
+    def __repr__(self) -> str:
+        return (
+            f"SignatureCache(size={len(self)}, maxsize={self.maxsize}, "
+            f"eviction={self.eviction}, hit_rate={self.hit_rate():.2f})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __call__(self, sec: bytes, der: bytes, z: int) -> bool:
+        return self.verify(sec, der, z)
+
+    @property
+    def maxsize(self) -> int:
+        return self._cache.maxsize
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions
+
+    def hit_rate(self) -> float:
+        return self._cache.hit_rate()
+
+    def key(self, sec: bytes, der: bytes, z: int) -> bytes:
+        """Returns the salted cache key of a signature check"""
+        h = hashlib.sha256(self._salt)
+        h.update(z.to_bytes(32, "big"))
+        # the lengths keep different splits of the same bytes apart
+        h.update(bytes([len(sec)]))
+        h.update(sec)
+        h.update(der)
+        return h.digest()
+
+    def contains(self, sec: bytes, der: bytes, z: int) -> bool:
+        """Returns whether the signature check is known to be valid"""
+        return self._cache.get(self.key(sec, der, z), False)
+
+    def add(self, sec: bytes, der: bytes, z: int) -> None:
+        """Records a signature check as valid"""
+        self._cache.put(self.key(sec, der, z), True)
+
+    def verify(self, sec: bytes, der: bytes, z: int) -> bool:
+        """Verifies a DER signature of the message z against a SEC public
+        key, only calling the underlying verify on a cache miss"""
+        key = self.key(sec, der, z)
+        if self._cache.get(key, False):
+            return True
+
+        # verified outside of the cache's lock, threads only wait on each
+        # other for the dict operations
+        valid = self._verify(sec, der, z)
+        if valid:
+            self._cache.put(key, True)
+        return valid
+
+    def resize(self, maxsize: int) -> None:
+        self._cache.resize(maxsize)
+
+    def clear(self) -> None:
+        self._cache.clear()
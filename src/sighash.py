@@ -0,0 +1,281 @@
+"""Signature hashes of transaction inputs
+
+TransactionSighash computes the message z that PrivateKey.sign and
+S256Point.verify operate on, for every input of a transaction. Everything
+that does not depend on the input being signed is computed once per
+transaction and cached, so hashing all inputs stays linear for segwit:
+
+    - legacy: the serialized outputs and every outpoint/sequence pair
+    - BIP143 (segwit v0): hashPrevouts, hashSequence and hashOutputs
+    - BIP341 (taproot): sha_prevouts, sha_amounts, sha_scriptpubkeys,
+      sha_sequences and sha_outputs
+"""
+
+import hashlib
+
+from utils import ByteWriter, double_sha256, encode_varint, int_to_le, varint_size
+
+
+SIGHASH_DEFAULT = 0x00
+SIGHASH_ALL = 0x01
+SIGHASH_NONE = 0x02
+SIGHASH_SINGLE = 0x03
+SIGHASH_ANYONECANPAY = 0x80
+
+# returned by legacy SIGHASH_SINGLE when there is no output at the input's
+# index, a consensus quirk of the original implementation. The signed
+# message is uint256 one, the bytes 01 00 .. 00, read big endian like every
+# other sighash here
+SIGHASH_SINGLE_BUG = 1 << 248
+
+
+def tagged_hash(tag: str, data: bytes) -> bytes:
+    """BIP340 tagged hash, sha256(sha256(tag) || sha256(tag) || data)"""
+    tag_hash = hashlib.sha256(tag.encode()).digest()
+    return hashlib.sha256(tag_hash + tag_hash + data).digest()
+
+
+def _sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+class TransactionSighash:
+    """Computes and caches signature hashes for the inputs of a transaction"""
+
+    def __init__(self, tx) -> None:
+        self.tx = tx
+        self._outpoints = None
+        self._sequences = None
+        self._outputs = None
+        self._hash_prevouts = None
+        self._hash_sequence = None
+        self._hash_outputs = None
+        self._taproot = None
+
+    @property
+    def outpoints(self) -> list[bytes]:
+        if self._outpoints is None:
+            self._outpoints = [inp.outpoint for inp in self.tx.inputs]
+        return self._outpoints
+
+    @property
+    def sequences(self) -> list[bytes]:
+        if self._sequences is None:
+            self._sequences = [
+                int_to_le(inp.sequence_number, 4) for inp in self.tx.inputs
+            ]
+        return self._sequences
+
+    @property
+    def outputs(self) -> list[bytes]:
+        if self._outputs is None:
+            self._outputs = [output.hex for output in self.tx.outputs]
+        return self._outputs
+
+    def legacy(self, index: int, script_code: bytes, hash_type: int = SIGHASH_ALL):
+        """Returns the pre segwit signature hash of the input at index as an
+        int. script_code is the previous output's scriptPubKey, or the redeem
+        script for p2sh, without a length prefix.
+
+        Every legacy hash covers a modified copy of the whole transaction, so
+        only the parts shared between inputs are cached here. OP_CODESEPARATOR
+        and signatures inside script_code are not removed."""
+        base_type = hash_type & 0x1F
+        anyone_can_pay = hash_type & SIGHASH_ANYONECANPAY
+        n_outputs = len(self.outputs)
+        if base_type == SIGHASH_SINGLE and index >= n_outputs:
+            return SIGHASH_SINGLE_BUG
+
+        if anyone_can_pay:
+            signed_inputs = [index]
+        else:
+            signed_inputs = range(len(self.outpoints))
+
+        if base_type == SIGHASH_NONE:
+            signed_outputs = []
+        elif base_type == SIGHASH_SINGLE:
+            signed_outputs = self.outputs[: index + 1]
+        else:
+            signed_outputs = self.outputs
+
+        script_field = encode_varint(len(script_code)) + script_code
+        size = (
+            12
+            + varint_size(len(signed_inputs))
+            + 41 * len(signed_inputs)
+            + len(script_field)
+            - 1
+            + varint_size(len(signed_outputs))
+            + sum(len(output) for output in signed_outputs)
+        )
+
+        writer = ByteWriter(size)
+        writer.write_uint32(self.tx.version)
+        writer.write_varint(len(signed_inputs))
+        for i in signed_inputs:
+            writer.write(self.outpoints[i])
+            if i == index:
+                writer.write(script_field)
+            else:
+                writer.write_varint(0)
+
+            # NONE and SINGLE let the other inputs update their sequence
+            if i != index and base_type in (SIGHASH_NONE, SIGHASH_SINGLE):
+                writer.write_uint32(0)
+            else:
+                writer.write(self.sequences[i])
+
+        writer.write_varint(len(signed_outputs))
+        for i, output in enumerate(signed_outputs):
+            if base_type == SIGHASH_SINGLE and i != index:
+                # blank output, a value of -1 and an empty script
+                writer.write(b"\xff" * 8 + b"\x00")
+            else:
+                writer.write(output)
+
+        writer.write_uint32(self.tx.locktime)
+        writer.write_uint32(hash_type)
+        return int.from_bytes(double_sha256(writer.getvalue()), "big")
+
+    @property
+    def hash_prevouts(self) -> bytes:
+        if self._hash_prevouts is None:
+            self._hash_prevouts = double_sha256(b"".join(self.outpoints))
+        return self._hash_prevouts
+
+    @property
+    def hash_sequence(self) -> bytes:
+        if self._hash_sequence is None:
+            self._hash_sequence = double_sha256(b"".join(self.sequences))
+        return self._hash_sequence
+
+    @property
+    def hash_outputs(self) -> bytes:
+        if self._hash_outputs is None:
+            self._hash_outputs = double_sha256(b"".join(self.outputs))
+        return self._hash_outputs
+
+    def segwit_v0(
+        self,
+        index: int,
+        script_code: bytes,
+        amount: int,
+        hash_type: int = SIGHASH_ALL,
+    ):
+        """Returns the BIP143 signature hash of the input at index as an int.
+        script_code is given without a length prefix, for p2wpkh it is the
+        p2pkh script of the key hash, amount is the value of the spent output"""
+        base_type = hash_type & 0x1F
+        anyone_can_pay = hash_type & SIGHASH_ANYONECANPAY
+        zero = bytes(32)
+
+        hash_prevouts = zero if anyone_can_pay else self.hash_prevouts
+        if anyone_can_pay or base_type in (SIGHASH_NONE, SIGHASH_SINGLE):
+            hash_sequence = zero
+        else:
+            hash_sequence = self.hash_sequence
+
+        if base_type not in (SIGHASH_NONE, SIGHASH_SINGLE):
+            hash_outputs = self.hash_outputs
+        elif base_type == SIGHASH_SINGLE and index < len(self.outputs):
+            hash_outputs = double_sha256(self.outputs[index])
+        else:
+            hash_outputs = zero
+
+        script_field = encode_varint(len(script_code)) + script_code
+        writer = ByteWriter(156 + len(script_field))
+        writer.write_uint32(self.tx.version)
+        writer.write(hash_prevouts)
+        writer.write(hash_sequence)
+        writer.write(self.outpoints[index])
+        writer.write(script_field)
+        writer.write_uint64(amount)
+        writer.write(self.sequences[index])
+        writer.write(hash_outputs)
+        writer.write_uint32(self.tx.locktime)
+        writer.write_uint32(hash_type)
+        return int.from_bytes(double_sha256(writer.getvalue()), "big")
+
+    def _taproot_hashes(self, amounts, script_pubkeys) -> tuple[bytes, ...]:
+        # the amounts and scripts of the spent outputs are the same for every
+        # input, so they are checked and hashed once
+        if self._taproot is None:
+            if len(amounts) != len(self.outpoints) or len(script_pubkeys) != len(
+                self.outpoints
+            ):
+                raise ValueError("Need the amount and script of every spent output")
+
+            self._taproot = (
+                _sha256(b"".join(self.outpoints)),
+                _sha256(b"".join(int_to_le(amount, 8) for amount in amounts)),
+                _sha256(
+                    b"".join(
+                        encode_varint(len(script)) + script for script in script_pubkeys
+                    )
+                ),
+                _sha256(b"".join(self.sequences)),
+                _sha256(b"".join(self.outputs)),
+            )
+        return self._taproot
+
+    def taproot(
+        self,
+        index: int,
+        amounts: list[int],
+        script_pubkeys: list[bytes],
+        hash_type: int = SIGHASH_DEFAULT,
+        annex: bytes = None,
+        leaf_hash: bytes = None,
+    ):
+        """Returns the BIP341 signature hash of the input at index as an int.
+        amounts and script_pubkeys describe every output spent by the
+        transaction, in input order. leaf_hash is set for script path
+        spends. The cached values assume the same amounts and scripts are
+        passed for every input of the transaction"""
+        base_type = hash_type & 0x03
+        anyone_can_pay = hash_type & SIGHASH_ANYONECANPAY
+        if hash_type not in (0x00, 0x01, 0x02, 0x03, 0x81, 0x82, 0x83):
+            raise ValueError(f"Invalid taproot hash type {hash_type}")
+        if base_type == SIGHASH_SINGLE and index >= len(self.outputs):
+            raise ValueError(f"No output at index {index} for SIGHASH_SINGLE")
+
+        sha_prevouts, sha_amounts, sha_scripts, sha_sequences, sha_outputs = (
+            self._taproot_hashes(amounts, script_pubkeys)
+        )
+
+        # epoch, hash type, version and locktime
+        parts = [
+            b"\x00",
+            bytes([hash_type]),
+            int_to_le(self.tx.version, 4),
+            int_to_le(self.tx.locktime, 4),
+        ]
+        if not anyone_can_pay:
+            parts += [sha_prevouts, sha_amounts, sha_scripts, sha_sequences]
+        if base_type not in (SIGHASH_NONE, SIGHASH_SINGLE):
+            parts.append(sha_outputs)
+
+        spend_type = (2 if leaf_hash is not None else 0) + (annex is not None)
+        parts.append(bytes([spend_type]))
+
+        if anyone_can_pay:
+            script = script_pubkeys[index]
+            parts += [
+                self.outpoints[index],
+                int_to_le(amounts[index], 8),
+                encode_varint(len(script)) + script,
+                self.sequences[index],
+            ]
+        else:
+            parts.append(int_to_le(index, 4))
+
+        if annex is not None:
+            parts.append(_sha256(encode_varint(len(annex)) + annex))
+        if base_type == SIGHASH_SINGLE:
+            parts.append(_sha256(self.outputs[index]))
+        if leaf_hash is not None:
+            # key version 0 and no OP_CODESEPARATOR executed
+            parts += [leaf_hash, b"\x00", b"\xff\xff\xff\xff"]
+
+        digest = tagged_hash("TapSighash", b"".join(parts))
+        return int.from_bytes(digest, "big")
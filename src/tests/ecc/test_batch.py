@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+from ecc.batch import verify_batch
+from ecc.const import N
+from ecc.key import PrivateKey
+from ecc.sign import Signature
+
+
+class VerifyBatchTest(TestCase):
+    def test_verify_batch(self):
+        items = []
+        for i in range(1, 6):
+            pk = PrivateKey(i * 0x1234567890ABCDEF)
+            z = i * 0xFEDCBA0987654321
+            items.append((pk.point, z, pk.sign(z)))
+
+        self.assertEqual(verify_batch(items), [True] * 5)
+
+        # wrong message, wrong key and out of range signatures
+        point, z, sig = items[0]
+        items[1] = (point, z + 1, sig)
+        items[2] = (items[3][0], z, sig)
+        items[4] = (point, z, Signature(sig.r, N))
+        self.assertEqual(verify_batch(items), [True, False, False, True, False])
+
+    def test_verify_batch_empty(self):
+        self.assertEqual(verify_batch([]), [])
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from ecc.bulk import KeyRecord, derive_keys, scan_range
+from ecc.const import N
+from ecc.key import PrivateKey
+
+
+class DeriveManyTest(TestCase):
+    def test_derive_many(self):
+        secrets = [888**3, 321, 4242424242] + list(range(1, 20))
+        for workers in (None, 2):
+            records = list(PrivateKey.derive_many(iter(secrets), workers=workers))
+            self.assertEqual([record.secret for record in records], secrets)
+            for record in records:
+                point = PrivateKey(record.secret).point
+                self.assertEqual(record.sec, point.sec())
+                self.assertEqual(record.hash160, point.hash160())
+                self.assertEqual(record.address, point.address())
+
+    def test_derive_many_options(self):
+        (record,) = PrivateKey.derive_many([321], compressed=False, testnet=True)
+        self.assertEqual(record.address, "mfx3y63A7TfTtXKkv7Y6QzsPFY6QCBCXiP")
+
+    def test_derive_keys_chunks(self):
+        records = list(derive_keys(range(1, 11), chunk_size=3))
+        self.assertEqual(len(records), 10)
+        self.assertIsInstance(records[0], KeyRecord)
+
+    def test_invalid_secret(self):
+        with self.assertRaises(ValueError):
+            list(PrivateKey.derive_many([1, 0]))
+
+
+class ScanRangeTest(TestCase):
+    def test_scan_range(self):
+        start = 2**128 - 5
+        expected = list(PrivateKey.derive_many(range(start, start + 25)))
+        for workers in (None, 2):
+            records = PrivateKey.scan_range(start, 25, workers=workers)
+            self.assertEqual(list(records), expected)
+
+    def test_scan_range_chunks(self):
+        records = list(scan_range(1, 10, chunk_size=4))
+        self.assertEqual([record.secret for record in records], list(range(1, 11)))
+        self.assertEqual(records, list(derive_keys(range(1, 11))))
+
+    def test_scan_range_bounds(self):
+        with self.assertRaises(ValueError):
+            list(scan_range(0, 5))
+        with self.assertRaises(ValueError):
+            list(scan_range(N - 2, 5))
@@ -0,0 +1,89 @@
+from unittest import TestCase
+from threading import Thread
+
+from ecc.cache import LRUCache, RandomCache
+
+
+class LRUCacheTest(TestCase):
+    def test_eviction(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        # b was the least recently used
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.hit_rate(), 0.5)
+
+    def test_resize(self):
+        cache = LRUCache(maxsize=3)
+        for i in range(3):
+            cache.put(i, i)
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertIn(2, cache)
+        with self.assertRaises(ValueError):
+            cache.resize(-1)
+
+    def test_disabled(self):
+        cache = LRUCache(maxsize=2, enabled=False)
+        cache.put("a", 1)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get("a", 0), 0)
+
+        cache = LRUCache(maxsize=0)
+        cache.put("a", 1)
+        self.assertEqual(len(cache), 0)
+
+
+class RandomCacheTest(TestCase):
+    def test_eviction(self):
+        cache = RandomCache(maxsize=10)
+        for i in range(100):
+            cache.put(i, i)
+            self.assertLessEqual(len(cache), 10)
+
+        self.assertEqual(cache.evictions, 90)
+        for key in cache._keys:
+            self.assertEqual(cache.get(key), key)
+            self.assertEqual(cache._keys[cache._positions[key]], key)
+        self.assertEqual(cache.hits, 10)
+
+    def test_overwrite(self):
+        cache = RandomCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("a", 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("a"), 2)
+
+    def test_resize(self):
+        cache = RandomCache(maxsize=5)
+        for i in range(5):
+            cache.put(i, i)
+        cache.resize(2)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(sorted(cache._positions.values()), [0, 1])
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache._keys, [])
+
+    def test_clear_concurrent_puts(self):
+        cache = RandomCache(maxsize=50)
+
+        def fill():
+            for i in range(2000):
+                cache.put(i, i)
+
+        thread = Thread(target=fill)
+        thread.start()
+        for _ in range(200):
+            cache.clear()
+        thread.join()
+
+        self.assertEqual(len(cache._keys), len(cache))
+        self.assertEqual(set(cache._keys), set(cache._data))
+        for key, i in cache._positions.items():
+            self.assertEqual(cache._keys[i], key)
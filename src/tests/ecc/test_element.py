@@ -55,3 +55,15 @@ class FieldElementTest(TestCase):
         a = FieldElement(4, 31)
         b = FieldElement(11, 31)
         self.assertEqual(a**-4 * b, FieldElement(13, 31))
+
+    def test_batch_inverse(self):
+        elements = [FieldElement(n, 31) for n in (1, 3, 17, 24, 30)]
+        inverses = FieldElement.batch_inverse(elements)
+        for element, inverse in zip(elements, inverses):
+            self.assertEqual(element * inverse, FieldElement(1, 31))
+
+        self.assertEqual(FieldElement.batch_inverse([]), [])
+        with self.assertRaises(ValueError):
+            FieldElement.batch_inverse([FieldElement(3, 31), FieldElement(0, 31)])
+        with self.assertRaises(TypeError):
+            FieldElement.batch_inverse([FieldElement(3, 31), FieldElement(3, 37)])
@@ -0,0 +1,76 @@
+from unittest import TestCase
+
+from ecc.const import N, P
+from ecc.jacobian import (
+    BETA,
+    G,
+    LAMBDA,
+    from_jacobian,
+    generator_multiply,
+    glv_multiply,
+    glv_split,
+    jacobian_double,
+    jacobian_multiply,
+    normalize_batch,
+    wnaf,
+    INFINITY,
+)
+
+
+class GeneratorTableTest(TestCase):
+    def test_generator_multiply(self):
+        secrets = (1, 2, 15, 16, 17, 0xDEADBEEF, 2**128, N - 1, 2**256 - 1)
+        for secret in secrets:
+            self.assertEqual(
+                from_jacobian(generator_multiply(secret)),
+                from_jacobian(jacobian_multiply(G, secret)),
+            )
+
+    def test_generator_multiply_zero(self):
+        self.assertIsNone(from_jacobian(generator_multiply(0)))
+        self.assertIsNone(from_jacobian(generator_multiply(N)))
+
+
+class NormalizeBatchTest(TestCase):
+    def test_normalize_batch(self):
+        points = [jacobian_multiply(G, k) for k in (1, 2, 3, 0xDEADBEEF)]
+        points.append(jacobian_double(points[-1]))
+        points.insert(2, INFINITY)
+        self.assertEqual(
+            normalize_batch(points), [from_jacobian(point) for point in points]
+        )
+        self.assertEqual(normalize_batch([]), [])
+
+
+class WnafTest(TestCase):
+    def test_wnaf(self):
+        for width in (2, 5, 8):
+            for k in (1, 7, 255, 0xDEADBEEF, N - 1):
+                digits = wnaf(k, width)
+                self.assertEqual(sum(d << i for i, d in enumerate(digits)), k)
+                for digit in digits:
+                    self.assertTrue(digit == 0 or digit % 2 == 1)
+                    self.assertLess(abs(digit), 1 << (width - 1))
+
+
+class GLVTest(TestCase):
+    def test_endomorphism(self):
+        lambda_g = from_jacobian(jacobian_multiply(G, LAMBDA))
+        self.assertEqual(lambda_g, (BETA * G[0] % P, G[1]))
+
+    def test_glv_split(self):
+        for k in (1, 2**128, 0xDEADBEEF * 2**200 % N, N - 1, LAMBDA):
+            k1, k2 = glv_split(k)
+            self.assertEqual((k1 + k2 * LAMBDA) % N, k)
+            self.assertLessEqual(abs(k1).bit_length(), 129)
+            self.assertLessEqual(abs(k2).bit_length(), 129)
+
+    def test_glv_multiply(self):
+        point = from_jacobian(jacobian_multiply(G, 0xC0FFEE))
+        for k in (1, 3, 2**128 + 1, N - 1, N // 3):
+            self.assertEqual(
+                from_jacobian(glv_multiply(point, k)),
+                from_jacobian(jacobian_multiply(point, k)),
+            )
+
+        self.assertIsNone(from_jacobian(glv_multiply(point, 0)))
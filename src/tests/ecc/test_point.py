@@ -76,6 +76,35 @@ class S256Test(TestCase):
             # check that the secret*G is the same as the point
             self.assertEqual(secret * G, point)
 
+    def test_rmul_matches_affine(self):
+        # the Jacobian path must agree with generic affine double and add
+        for secret in (1, 2, 3, 0xDEADBEEF, N - 1, 2**255 + 12345):
+            self.assertEqual(secret * G, Point.__rmul__(G, secret))
+
+        self.assertIsNone((0 * G).x)
+        self.assertEqual((N + 5) * G, 5 * G)
+
+    def test_add(self):
+        a = 0xC0FFEE * G
+        b = 0xBEEF * G
+        self.assertEqual(a + b, Point.__add__(a, b))
+        self.assertEqual(a + a, Point.__add__(a, a))
+        self.assertEqual(a + (N - 0xC0FFEE) * G, S256Point(None, None))
+        self.assertEqual(S256Point(None, None) + b, b)
+        # trusted results are still valid points on the curve
+        total = a + b
+        self.assertEqual(S256Point(total.x.num, total.y.num), total)
+
+    def test_double_multiply(self):
+        point = 0xC0FFEE * G
+        cases = ((1, 1), (0, 5), (5, 0), (2**200 + 3, N - 7), (N - 1, 2**255))
+        for u, v in cases:
+            self.assertEqual(G.double_multiply(u, point, v), u * G + v * point)
+            self.assertEqual(point.double_multiply(u, G, v), u * point + v * G)
+
+        # u * G + (N - u) * G is the point at infinity
+        self.assertIsNone(G.double_multiply(12345, G, N - 12345).x)
+
     def test_verify(self):
         point = S256Point(
             0x887387E452B8EACC4ACFDE10D9AAF7F6D9A0F975AABB10D006E4DA568744D06C,
@@ -89,6 +118,10 @@ class S256Test(TestCase):
         r = 0xEFF69EF2B1BD93A66ED5219ADD4FB51E11A840F404876325A1E8FFE0529A2C
         s = 0xC7207FEE197D27C618AEA621406F6BF5EF6FCA38681D82B2F06FDDBDCE6FEAB6
         self.assertTrue(point.verify(z, Signature(r, s)))
+        # out of range r or s
+        self.assertFalse(point.verify(z, Signature(r, 0)))
+        self.assertFalse(point.verify(z, Signature(0, s)))
+        self.assertFalse(point.verify(z, Signature(r, N)))
 
     def test_sec(self):
         coefficient = 999**3
@@ -139,3 +172,27 @@ class S256Test(TestCase):
             point.address(compressed=False, testnet=False), mainnet_address
         )
         self.assertEqual(point.address(compressed=False, testnet=True), testnet_address)
+
+    def test_parse(self):
+        point = 999**3 * G
+        for compressed in (True, False):
+            self.assertEqual(S256Point.parse(point.sec(compressed)), point)
+
+    def test_parse_cache(self):
+        cache = S256Point.parse_cache
+        cache.clear()
+        sec = (123 * G).sec()
+        first = S256Point.parse(sec)
+        second = S256Point.parse(sec)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.enabled = False
+        try:
+            self.assertIsNot(S256Point.parse(sec), first)
+            self.assertEqual(cache.misses, 2)
+        finally:
+            cache.enabled = True
+
+        with self.assertRaises(ValueError):
+            S256Point.parse(b"\x04" + b"\x01" * 64)
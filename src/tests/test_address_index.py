@@ -0,0 +1,107 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from address_index import AddressIndex, IndexEntry, scripthash
+from ecc.utils import hash160
+from interpreter import p2pkh_script
+from tests.test_utxo import coinbase_tx, spend_tx
+from tests.test_validation import h160, script_pubkey
+
+
+class AddressIndexTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "index")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_lookup(self):
+        other = p2pkh_script(hash160(b"other"))
+        with AddressIndex(self.path, memtable_size=4) as index:
+            for i in range(10):
+                index.add(script_pubkey if i % 2 else other, f"{i:064x}", i, i * 10, i)
+
+            self.assertEqual(len(index.segments), 2)
+            entries = index.lookup_script(script_pubkey)
+            self.assertEqual([entry.height for entry in entries], [1, 3, 5, 7, 9])
+            self.assertEqual(entries[0], IndexEntry(f"{1:064x}", 1, 10, 1))
+            self.assertEqual(index.lookup_script(b"\x51"), [])
+            self.assertEqual(len(index), 10)
+
+    def test_transactions(self):
+        with AddressIndex(self.path) as index:
+            coinbase = coinbase_tx(1)
+            index.add_transactions([coinbase], 1)
+            spend = spend_tx(coinbase.txid, 1, 49000)
+            index.add_transactions([coinbase_tx(2), spend], 2)
+
+            # OP_RETURN outputs are skipped
+            self.assertEqual(len(index), 3)
+            entries = index.lookup_hash160(h160)
+            self.assertEqual(entries[0], (coinbase.txid, 0, 50000, 1))
+            # entries of the same height are ordered by txid
+            self.assertEqual(
+                {(entry.txid, entry.value, entry.height) for entry in entries[1:]},
+                {(coinbase_tx(2).txid, 50000, 2), (spend.txid, 49000, 2)},
+            )
+
+    def test_reopen_and_merge(self):
+        with AddressIndex(self.path, memtable_size=3, max_segments=0) as index:
+            for i in range(10):
+                index.add(script_pubkey, f"{i:064x}", 0, i, 100 - i)
+
+        with AddressIndex(self.path, max_segments=0) as index:
+            self.assertEqual(len(index.segments), 4)
+            before = index.lookup(scripthash(script_pubkey))
+            self.assertEqual([entry.height for entry in before], list(range(91, 101)))
+
+            index.merge()
+            self.assertEqual(len(index.segments), 1)
+            self.assertEqual(len(os.listdir(self.path)), 1)
+            self.assertEqual(index.lookup(scripthash(script_pubkey)), before)
+            index.add(script_pubkey, "ff" * 32, 0, 1, 5)
+
+        with AddressIndex(self.path) as index:
+            self.assertEqual(len(index), 11)
+            self.assertEqual(len(index.segments), 2)
+
+    def test_interrupted_merge(self):
+        with AddressIndex(self.path, memtable_size=2, max_segments=0) as index:
+            for i in range(6):
+                index.add(script_pubkey, f"{i:064x}", 0, i, i)
+            old = sorted(os.listdir(self.path))
+            self.assertEqual(old, ["00000001.seg", "00000002.seg", "00000003.seg"])
+
+            # put the old segments back, as a crash before they were removed would
+            contents = {}
+            for name in old:
+                with open(os.path.join(self.path, name), "rb") as f:
+                    contents[name] = f.read()
+            index.merge()
+            self.assertEqual(os.listdir(self.path), ["00000001-00000004.seg"])
+
+        for name, data in contents.items():
+            with open(os.path.join(self.path, name), "wb") as f:
+                f.write(data)
+
+        with AddressIndex(self.path) as index:
+            self.assertEqual(len(index.segments), 1)
+            self.assertEqual(len(index), 6)
+            self.assertEqual(len(index.lookup_script(script_pubkey)), 6)
+            self.assertEqual(os.listdir(self.path), ["00000001-00000004.seg"])
+
+            # later merges cover the earlier merged segment too
+            index.add(script_pubkey, "ff" * 32, 0, 1, 7)
+            index.flush()
+            index.merge()
+            self.assertEqual(os.listdir(self.path), ["00000001-00000006.seg"])
+            self.assertEqual(len(index), 7)
+
+    def test_auto_merge(self):
+        with AddressIndex(self.path, memtable_size=1, max_segments=3) as index:
+            for i in range(4):
+                index.add(script_pubkey, f"{i:064x}", 0, i, i)
+            self.assertEqual(len(index.segments), 1)
+            self.assertEqual(len(index.lookup_script(script_pubkey)), 4)
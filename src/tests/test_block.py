@@ -0,0 +1,94 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from block import Block
+from block_reader import BlockFileReader, MAINNET_MAGIC, blk_files
+from tests import test_tx
+from transaction import Transaction
+from utils import encode_varint, int_to_le
+
+
+raw_tx = bytes.fromhex(test_tx.raw_hex)
+
+# mainnet genesis block header
+genesis_header = bytes.fromhex(
+    "0100000000000000000000000000000000000000000000000000000000000000"
+    "000000003ba3edfd7a7b12b27ac72c3e67768f617fc81bc3888a51323a9fb8aa"
+    "4b1e5e4a29ab5f49ffff001d1dac2b7c"
+)
+genesis_hash = "000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f"
+
+
+def make_block(n_transactions: int) -> bytes:
+    return genesis_header + encode_varint(n_transactions) + raw_tx * n_transactions
+
+
+def frame(block: bytes) -> bytes:
+    return MAINNET_MAGIC + int_to_le(len(block), 4) + block
+
+
+class BlockTest(TestCase):
+    def test_header(self):
+        block = Block.from_hex(make_block(1))
+        self.assertEqual(block.hash, genesis_hash)
+        self.assertEqual(block.header.version, 1)
+        self.assertEqual(block.header.previous_block_hash, "0" * 64)
+        self.assertEqual(block.header.timestamp, 1231006505)
+        self.assertEqual(block.header.bits, 0x1D00FFFF)
+        self.assertEqual(block.header.nonce, 2083236893)
+
+    def test_transactions(self):
+        block = Block.from_hex(make_block(3))
+        txids = [tx.txid for tx in block.transactions]
+        self.assertEqual(txids, [Transaction.from_hex(raw_tx).txid] * 3)
+
+    def test_overrun(self):
+        raw = make_block(2)
+        block = Block.from_hex(raw, 0, len(raw) - len(raw_tx))
+        with self.assertRaises(Exception):
+            list(block.transactions)
+
+
+class BlockFileReaderTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "blk00000.dat")
+        self.blocks = [make_block(1), make_block(2), make_block(3)]
+        with open(self.path, "wb") as f:
+            for block in self.blocks:
+                f.write(frame(block))
+            # preallocated space at the end of the file
+            f.write(b"\x00" * 64)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_blocks(self):
+        with BlockFileReader(self.path) as reader:
+            blocks = list(reader)
+            self.assertEqual([b.n_transactions for b in blocks], [1, 2, 3])
+            self.assertEqual([b.hex for b in blocks], self.blocks)
+            self.assertEqual(blocks[0].file_offset, 0)
+            self.assertEqual(len(list(reader.transactions())), 6)
+
+    def test_seek(self):
+        with BlockFileReader(self.path) as reader:
+            offset = list(reader)[2].file_offset
+            self.assertEqual(offset, len(frame(self.blocks[0])) * 2 + len(raw_tx))
+            block = reader.block_at(offset)
+            self.assertEqual(block.n_transactions, 3)
+            self.assertEqual(len(list(reader.blocks(offset))), 1)
+
+    def test_bad_magic(self):
+        with BlockFileReader(self.path, magic=b"\x0b\x11\x09\x07") as reader:
+            with self.assertRaises(ValueError):
+                list(reader)
+
+    def test_empty_file(self):
+        path = os.path.join(self.dir.name, "blk00001.dat")
+        open(path, "wb").close()
+        with BlockFileReader(path) as reader:
+            self.assertEqual(list(reader), [])
+
+        self.assertEqual(blk_files(self.dir.name), [self.path, path])
@@ -0,0 +1,62 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import block_pipeline
+from block_pipeline import parse_blocks, block_summary
+from block_reader import MAINNET_MAGIC
+from tests.test_block import make_block, frame
+
+
+def count_transactions(block):
+    return sum(1 for _ in block.transactions)
+
+
+class ParseBlocksTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for n, sizes in enumerate(((1, 2, 3), (4, 1))):
+            path = os.path.join(self.dir.name, f"blk{n:05}.dat")
+            with open(path, "wb") as f:
+                for size in sizes:
+                    f.write(frame(make_block(size)))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_sequential(self):
+        results = list(parse_blocks(self.paths))
+        self.assertEqual([r.n_transactions for r in results], [1, 2, 3, 4, 1])
+        self.assertEqual(len(results[3].txids), 4)
+
+    def test_parallel_order(self):
+        expected = list(parse_blocks(self.paths, count_transactions))
+        self.assertEqual(expected, [1, 2, 3, 4, 1])
+        for blocks_per_task in (1, 2):
+            results = parse_blocks(
+                self.paths,
+                count_transactions,
+                workers=2,
+                max_pending=2,
+                blocks_per_task=blocks_per_task,
+            )
+            self.assertEqual(list(results), expected)
+
+        parallel = list(parse_blocks(self.paths, block_summary, workers=2))
+        self.assertEqual(parallel, list(parse_blocks(self.paths)))
+
+    def test_worker_closes_previous_file(self):
+        # what a worker runs, in process
+        first = block_pipeline._reader(self.paths[0], MAINNET_MAGIC)
+        self.assertIs(block_pipeline._reader(self.paths[0], MAINNET_MAGIC), first)
+
+        results = block_pipeline._parse_task(
+            (self.paths[1], [0]), count_transactions, MAINNET_MAGIC
+        )
+        self.assertEqual(results, [4])
+        self.assertTrue(first._file.closed)
+        self.assertEqual(block_pipeline._current_reader.path, self.paths[1])
+        block_pipeline._current_reader.close()
+        block_pipeline._current_reader = None
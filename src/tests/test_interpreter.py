@@ -0,0 +1,258 @@
+import hashlib
+from unittest import TestCase
+
+from ecc.key import PrivateKey
+from ecc.utils import hash160
+from interpreter import (
+    Interpreter,
+    ScriptError,
+    decode_num,
+    encode_num,
+    is_strict_der,
+    p2pkh_script,
+    verify_input,
+)
+from sighash import SIGHASH_ALL, SIGHASH_SINGLE
+from tests.test_sighash import legacy_hex, legacy_script_pubkey
+from transaction import Transaction
+from utils import encode_varint, int_to_le
+
+
+keys = [PrivateKey(secret) for secret in (8675309, 12345, 67890)]
+secs = [key.point.sec() for key in keys]
+
+prev_txid = bytes.fromhex("11" * 32)
+amount = 100000
+
+
+def push(data: bytes) -> bytes:
+    return bytes([len(data)]) + data
+
+
+def build_tx(script_sig: bytes = b"", witness: list[bytes] = None) -> Transaction:
+    """One input spending prev_txid:0 and one p2pkh output"""
+    raw = int_to_le(1, 4)
+    if witness is not None:
+        raw += b"\x00\x01"
+    raw += b"\x01" + prev_txid + int_to_le(0, 4)
+    raw += encode_varint(len(script_sig)) + script_sig + b"\xff\xff\xff\xff"
+    raw += b"\x01" + int_to_le(amount - 1000, 8) + push(p2pkh_script(bytes(20)))
+    if witness is not None:
+        raw += encode_varint(len(witness))
+        raw += b"".join(encode_varint(len(item)) + item for item in witness)
+    raw += int_to_le(0, 4)
+    return Transaction.from_hex(raw)
+
+
+def sign_legacy(key, script_code: bytes) -> bytes:
+    z = Interpreter(build_tx()).sighash.legacy(0, script_code, SIGHASH_ALL)
+    return key.sign(z).der() + bytes([SIGHASH_ALL])
+
+
+def sign_segwit(key, script_code: bytes) -> bytes:
+    z = Interpreter(build_tx()).sighash.segwit_v0(0, script_code, amount, SIGHASH_ALL)
+    return key.sign(z).der() + bytes([SIGHASH_ALL])
+
+
+def multisig_script(m: int, secs: list[bytes]) -> bytes:
+    return bytes([0x50 + m]) + b"".join(map(push, secs)) + bytes([0x50 + len(secs), 0xAE])
+
+
+def p2sh_script(redeem_script: bytes) -> bytes:
+    return b"\xa9\x14" + hash160(redeem_script) + b"\x87"
+
+
+class NumTest(TestCase):
+    def test_encode(self):
+        self.assertEqual(encode_num(0), b"")
+        self.assertEqual(encode_num(-1), b"\x81")
+        self.assertEqual(encode_num(128), b"\x80\x00")
+        self.assertEqual(encode_num(-128), b"\x80\x80")
+        for num in (1, -1, 127, 128, -255, 2**31 - 1, -(2**31 - 1)):
+            self.assertEqual(decode_num(encode_num(num)), num)
+
+    def test_overflow(self):
+        with self.assertRaises(ScriptError):
+            decode_num(b"\x01" * 5)
+
+
+class LegacyTest(TestCase):
+    def test_mainnet_p2pkh(self):
+        tx = Transaction.from_hex(bytes.fromhex(legacy_hex))
+        self.assertTrue(verify_input(tx, 0, legacy_script_pubkey))
+
+        other = p2pkh_script(hash160(secs[0]))
+        self.assertFalse(verify_input(tx, 0, other))
+
+    def test_p2pkh(self):
+        script_pubkey = p2pkh_script(hash160(secs[0]))
+        sig = sign_legacy(keys[0], script_pubkey)
+        tx = build_tx(push(sig) + push(secs[0]))
+        self.assertTrue(verify_input(tx, 0, script_pubkey))
+
+        # signed by the wrong key
+        sig = sign_legacy(keys[1], script_pubkey)
+        tx = build_tx(push(sig) + push(secs[0]))
+        with self.assertRaises(ScriptError):
+            Interpreter(tx).check_input(0, script_pubkey)
+
+    def test_p2pk(self):
+        script_pubkey = push(secs[1]) + b"\xac"
+        tx = build_tx(push(sign_legacy(keys[1], script_pubkey)))
+        self.assertTrue(verify_input(tx, 0, script_pubkey))
+
+    def test_invalid_signatures(self):
+        script_pubkey = push(secs[1]) + b"\xac"
+        # r = 1, s = 0 can never be valid
+        tx = build_tx(push(bytes.fromhex("3006020101020100") + bytes([SIGHASH_ALL])))
+        self.assertFalse(verify_input(tx, 0, script_pubkey))
+
+        # a valid signature with r padded by a needless zero byte is not DER
+        sig = sign_legacy(keys[1], script_pubkey)
+        len_r = sig[3]
+        padded = b"\x30" + bytes([sig[1] + 1]) + b"\x02" + bytes([len_r + 1])
+        padded += b"\x00" + sig[4:]
+        self.assertFalse(is_strict_der(padded))
+        self.assertTrue(is_strict_der(sig))
+        self.assertFalse(verify_input(build_tx(push(padded)), 0, script_pubkey))
+
+    def test_stack_size_pushes(self):
+        script_pubkey = push(b"\x01")
+        tx = build_tx(push(b"\x01") * 999)
+        self.assertTrue(verify_input(tx, 0, script_pubkey))
+        tx = build_tx(push(b"\x01") * 1001)
+        self.assertFalse(verify_input(tx, 0, script_pubkey))
+
+    def test_multisig(self):
+        script_pubkey = multisig_script(2, secs)
+        sigs = [sign_legacy(key, script_pubkey) for key in keys]
+        tx = build_tx(b"\x00" + push(sigs[0]) + push(sigs[2]))
+        self.assertTrue(verify_input(tx, 0, script_pubkey))
+
+        # signatures out of key order
+        tx = build_tx(b"\x00" + push(sigs[2]) + push(sigs[0]))
+        self.assertFalse(verify_input(tx, 0, script_pubkey))
+
+        # non empty dummy element
+        tx = build_tx(b"\x51" + push(sigs[0]) + push(sigs[2]))
+        self.assertFalse(verify_input(tx, 0, script_pubkey))
+
+    def test_p2sh_multisig(self):
+        redeem_script = multisig_script(2, secs)
+        sigs = [sign_legacy(key, redeem_script) for key in keys[:2]]
+        script_sig = b"\x00" + push(sigs[0]) + push(sigs[1]) + b"\x4c" + push(redeem_script)
+        tx = build_tx(script_sig)
+        self.assertTrue(verify_input(tx, 0, p2sh_script(redeem_script)))
+        self.assertFalse(verify_input(tx, 0, p2sh_script(redeem_script + b"\x75")))
+
+    def test_sighash_single_bug(self):
+        # the second input has no output at its index, so SIGHASH_SINGLE
+        # signs the message 01 00 .. 00
+        script_pubkey = p2pkh_script(hash160(secs[0]))
+        sig = keys[0].sign(1 << 248).der() + bytes([SIGHASH_SINGLE])
+        script_sig = push(sig) + push(secs[0])
+
+        raw = int_to_le(1, 4) + b"\x02"
+        for vout, script in ((0, b""), (1, script_sig)):
+            raw += prev_txid + int_to_le(vout, 4)
+            raw += encode_varint(len(script)) + script + b"\xff\xff\xff\xff"
+        raw += b"\x01" + int_to_le(amount - 1000, 8) + push(p2pkh_script(bytes(20)))
+        raw += int_to_le(0, 4)
+        tx = Transaction.from_hex(raw)
+        self.assertTrue(verify_input(tx, 1, script_pubkey))
+
+    def test_stack_ops(self):
+        tx = build_tx(b"\x52\x53")
+        # 2 3 OP_ADD 5 OP_EQUALVERIFY OP_1 OP_IF OP_1 OP_ELSE OP_0 OP_ENDIF
+        script = bytes([0x93, 0x55, 0x88, 0x51, 0x63, 0x51, 0x67, 0x00, 0x68])
+        self.assertTrue(verify_input(tx, 0, script))
+        # OP_RETURN in an unexecuted branch is fine
+        self.assertTrue(verify_input(tx, 0, bytes([0x00, 0x63, 0x6A, 0x68, 0x51])))
+        self.assertFalse(verify_input(tx, 0, bytes([0x6A])))
+        self.assertFalse(verify_input(tx, 0, bytes([0x63])))
+
+    def test_pick_roll(self):
+        tx = build_tx(b"\x51\x52\x53")
+        cases = [
+            # 1 2 3 2 OP_PICK -> 1 2 3 1
+            (bytes([0x52, 0x79, 0x51, 0x88, 0x53, 0x88, 0x52, 0x88, 0x51]), True),
+            # 1 2 3 2 OP_ROLL -> 2 3 1
+            (bytes([0x52, 0x7A, 0x51, 0x88, 0x53, 0x88, 0x52, 0x87]), True),
+            # OP_3DUP leaves six elements
+            (bytes([0x6F, 0x74, 0x56, 0x87]), True),
+            # 1 2 3 OP_2SWAP would need four elements
+            (bytes([0x72]), False),
+            (bytes([0x53, 0x79]), False),
+        ]
+        for script, expected in cases:
+            self.assertEqual(verify_input(tx, 0, script), expected, script.hex())
+
+        tx = build_tx(b"\x51\x52\x53\x54\x55\x56")
+        # 1 2 3 4 5 6 OP_2ROT -> 3 4 5 6 1 2
+        script = bytes([0x71, 0x52, 0x88, 0x51, 0x88, 0x56, 0x88, 0x55, 0x88, 0x54, 0x88, 0x53, 0x87])
+        self.assertTrue(verify_input(tx, 0, script))
+        # 1 2 3 4 5 6 OP_2OVER -> ... 3 4 5 6 3 4
+        script = bytes([0x70, 0x54, 0x88, 0x53, 0x87])
+        self.assertTrue(verify_input(tx, 0, script))
+        # 1 2 3 4 5 6 OP_2SWAP -> 1 2 5 6 3 4
+        script = bytes([0x72, 0x54, 0x88, 0x53, 0x88, 0x56, 0x88, 0x55, 0x87])
+        self.assertTrue(verify_input(tx, 0, script))
+
+    def test_multisig_op_count(self):
+        # 0 0 OP_20 OP_CHECKMULTISIG is 0 of 20 empty keys, valid alone
+        tx = build_tx(b"\x00\x00" + b"\x00" * 20 + b"\x01\x14")
+        self.assertTrue(verify_input(tx, 0, b"\xae"))
+        # 181 OP_NOPs plus the multisig's 1 + 20 operations is 202
+        self.assertFalse(verify_input(tx, 0, b"\x61" * 181 + b"\xae"))
+        self.assertTrue(verify_input(tx, 0, b"\x61" * 180 + b"\xae"))
+
+
+class SegwitTest(TestCase):
+    def test_p2wpkh(self):
+        h160 = hash160(secs[0])
+        script_pubkey = b"\x00\x14" + h160
+        sig = sign_segwit(keys[0], p2pkh_script(h160))
+        tx = build_tx(witness=[sig, secs[0]])
+        self.assertTrue(verify_input(tx, 0, script_pubkey, amount))
+        # the amount is committed to by the signature
+        self.assertFalse(verify_input(tx, 0, script_pubkey, amount + 1))
+        with self.assertRaises(ScriptError):
+            Interpreter(tx).check_input(0, script_pubkey)
+
+    def test_p2sh_p2wpkh(self):
+        h160 = hash160(secs[1])
+        program = b"\x00\x14" + h160
+        sig = sign_segwit(keys[1], p2pkh_script(h160))
+        tx = build_tx(push(program), witness=[sig, secs[1]])
+        self.assertTrue(verify_input(tx, 0, p2sh_script(program), amount))
+
+    def test_p2wsh_multisig(self):
+        witness_script = multisig_script(2, secs)
+        script_pubkey = b"\x00\x20" + hashlib.sha256(witness_script).digest()
+        sigs = [sign_segwit(key, witness_script) for key in keys[1:]]
+        tx = build_tx(witness=[b"", sigs[0], sigs[1], witness_script])
+        self.assertTrue(verify_input(tx, 0, script_pubkey, amount))
+
+        tx = build_tx(witness=[b"", sigs[0], sigs[1], witness_script + b"\x61"])
+        self.assertFalse(verify_input(tx, 0, script_pubkey, amount))
+
+
+class VerifyCallbackTest(TestCase):
+    def test_callback(self):
+        calls = []
+
+        def verify(sec, der, z):
+            calls.append((sec, der, z))
+            return True
+
+        script_pubkey = p2pkh_script(hash160(secs[0]))
+        sig = sign_legacy(keys[1], script_pubkey)
+        tx = build_tx(push(sig) + push(secs[0]))
+        # the callback decides, even for a signature from the wrong key
+        self.assertTrue(verify_input(tx, 0, script_pubkey, verify=verify))
+        ((sec, der, z),) = calls
+        self.assertEqual(sec, secs[0])
+        self.assertEqual(der, sig[:-1])
+
+        interpreter = Interpreter(tx, verify=lambda sec, der, z: False)
+        self.assertFalse(interpreter.verify_input(0, script_pubkey))
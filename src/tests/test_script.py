@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from script import Script, tokenize, decode_small_int
+from tests import test_tx
+from transaction import Transaction
+
+
+pubkey = bytes.fromhex(
+    "0349fc4e631e3624a545de3f89f5d8684c7b8138bd94bdd531d2e213bf016b278a"
+)
+
+scripts = {
+    "pubkeyhash": "76a914" + "11" * 20 + "88ac",
+    "p2sh": "a914" + "22" * 20 + "87",
+    "p2wpkh": "0014" + "33" * 20,
+    "p2wsh": "0020" + "44" * 32,
+    "p2tr": "5120" + "55" * 32,
+    "pubkey": "21" + pubkey.hex() + "ac",
+    "OP_RETURN": "6a0b68656c6c6f20776f726c64",
+    "multisig": "52" + ("21" + pubkey.hex()) * 3 + "53ae",
+    "unknown": "5151",
+    "invalid": "4c05aabb",
+}
+
+
+class TokenizeTest(TestCase):
+    def test_tokenize(self):
+        raw = bytes.fromhex("00" + "4c02aabb" + "4d0300ccddee" + "03010203" + "ac")
+        self.assertEqual(
+            tokenize(raw),
+            [0, b"\xaa\xbb", b"\xcc\xdd\xee", b"\x01\x02\x03", 0xAC],
+        )
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            tokenize(bytes.fromhex("05aabb"))
+        self.assertFalse(Script(bytes.fromhex("4d05")).is_valid())
+
+    def test_small_int(self):
+        self.assertEqual(decode_small_int(0x00), 0)
+        self.assertEqual(decode_small_int(0x60), 16)
+        with self.assertRaises(ValueError):
+            decode_small_int(0x61)
+
+
+class ScriptTypeTest(TestCase):
+    def test_types(self):
+        for expected, raw in scripts.items():
+            script = Script.from_hex(bytes.fromhex(raw))
+            self.assertEqual(script.type, expected, raw)
+
+    def test_fast_path(self):
+        # the standard templates never need the tokenizer
+        for name in ("pubkeyhash", "p2sh", "p2wpkh", "p2wsh", "p2tr", "pubkey"):
+            script = Script(bytes.fromhex(scripts[name]))
+            script.type
+            self.assertIsNone(script._operations)
+
+    def test_not_multisig(self):
+        # 2 of 3 with only two keys
+        raw = "52" + ("21" + pubkey.hex()) * 2 + "53ae"
+        self.assertFalse(Script(bytes.fromhex(raw)).is_multisig())
+        # ends like a multisig but the last push swallows the opcodes
+        raw = "51" + "24" + pubkey.hex() + "52" + "52ae"
+        self.assertFalse(Script(bytes.fromhex(raw)).is_multisig())
+
+
+class OutputTypeTest(TestCase):
+    def test_output_types(self):
+        tx = Transaction.from_hex(bytes.fromhex(test_tx.raw_hex))
+        for output in tx.outputs:
+            self.assertEqual(output.type, "p2wpkh")
+            self.assertTrue(output.is_p2wpkh())
+            (address,) = output.addresses
+            self.assertEqual(address.hash, output.script.operations[1])
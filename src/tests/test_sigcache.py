@@ -0,0 +1,100 @@
+from threading import Thread
+from unittest import TestCase
+
+from ecc.key import PrivateKey
+from interpreter import Interpreter, verify_signature
+from sigcache import SignatureCache
+from tests.test_sighash import legacy_hex, legacy_script_pubkey
+from transaction import Transaction
+
+
+key = PrivateKey(8675309)
+sec = key.point.sec()
+z = 0xDEADBEEF
+der = key.sign(z).der()
+
+
+class CountingVerify:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, sec, der, z):
+        self.calls += 1
+        return verify_signature(sec, der, z)
+
+
+class SignatureCacheTest(TestCase):
+    def test_hit(self):
+        verify = CountingVerify()
+        cache = SignatureCache(verify=verify)
+        self.assertFalse(cache.contains(sec, der, z))
+        self.assertTrue(cache.verify(sec, der, z))
+        self.assertTrue(cache(sec, der, z))
+        self.assertTrue(cache.contains(sec, der, z))
+        self.assertEqual(verify.calls, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        self.assertEqual(cache.hit_rate(), 0.5)
+
+    def test_invalid_not_cached(self):
+        verify = CountingVerify()
+        cache = SignatureCache(verify=verify)
+        self.assertFalse(cache.verify(sec, der, z + 1))
+        self.assertFalse(cache.verify(sec, der, z + 1))
+        self.assertEqual(verify.calls, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_salted_keys(self):
+        a = SignatureCache()
+        b = SignatureCache()
+        self.assertNotEqual(a.key(sec, der, z), b.key(sec, der, z))
+        self.assertEqual(len(a.key(sec, der, z)), 32)
+
+        c = SignatureCache(salt=bytes(32))
+        self.assertEqual(c.key(sec, der, z), SignatureCache(salt=bytes(32)).key(sec, der, z))
+        # the same bytes split differently between key and signature
+        self.assertNotEqual(c.key(sec, der, z), c.key(sec + der[:1], der[1:], z))
+
+    def test_eviction(self):
+        for eviction in ("lru", "random"):
+            cache = SignatureCache(maxsize=3, eviction=eviction, verify=lambda *a: True)
+            for i in range(10):
+                cache.verify(sec, der, i)
+            self.assertEqual(len(cache), 3)
+            self.assertEqual(cache.evictions, 7)
+
+        cache = SignatureCache(maxsize=2, eviction="lru", verify=lambda *a: True)
+        cache.verify(sec, der, 0)
+        cache.verify(sec, der, 1)
+        cache.verify(sec, der, 0)
+        cache.verify(sec, der, 2)
+        # 1 was the least recently used
+        self.assertTrue(cache.contains(sec, der, 0))
+        self.assertFalse(cache.contains(sec, der, 1))
+
+        with self.assertRaises(ValueError):
+            SignatureCache(eviction="fifo")
+
+    def test_interpreter(self):
+        tx = Transaction.from_hex(bytes.fromhex(legacy_hex))
+        cache = SignatureCache()
+        for _ in range(3):
+            interpreter = Interpreter(tx, verify=cache)
+            self.assertTrue(interpreter.verify_input(0, legacy_script_pubkey))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_threads(self):
+        cache = SignatureCache(maxsize=50, verify=lambda *a: True)
+
+        def work(start):
+            for i in range(start, start + 200):
+                cache.verify(sec, der, i % 100)
+
+        threads = [Thread(target=work, args=(i * 7,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.hits + cache.misses, 800)
+        self.assertEqual(len(cache._cache._keys), len(cache._cache._positions))
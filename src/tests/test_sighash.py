@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+from ecc.point import S256Point
+from ecc.sign import Signature
+from sighash import (
+    SIGHASH_ALL,
+    SIGHASH_ANYONECANPAY,
+    SIGHASH_NONE,
+    SIGHASH_SINGLE,
+    SIGHASH_SINGLE_BUG,
+    TransactionSighash,
+)
+from transaction import Transaction
+
+
+# p2pkh spend from Programming Bitcoin, chapter 7
+legacy_hex = (
+    "0100000001813f79011acb80925dfe69b3def355fe914bd1d96a3f5f71bf8303c6a989c7d1"
+    "000000006b483045022100ed81ff192e75a3fd2304004dcadb746fa5e24c5031ccfcf21320"
+    "b0277457c98f02207a986d955c6e0cb35d446a89d3f56100f4d7f67801c31967743a9c8e10"
+    "615bed01210349fc4e631e3624a545de3f89f5d8684c7b8138bd94bdd531d2e213bf016b27"
+    "8afeffffff02a135ef01000000001976a914bc3b654dca7e56b04dca18f2566cdaf02e8d9a"
+    "da88ac99c39800000000001976a9141c4bc762dd5423e332166702cb75f40df79fea1288ac"
+    "19430600"
+)
+legacy_script_pubkey = bytes.fromhex("76a914a802fc56c704ce87c42d7c92eb75e7896bdc41ae88ac")
+
+# native p2wpkh example from BIP143
+bip143_hex = (
+    "0100000002fff7f7881a8099afa6940d42d1e7f6362bec38171ea3edf433541db4e4ad969f"
+    "0000000000eeffffffef51e1b804cc89d182d279655c3aa89e815b1b309fe287d9b2b55d57"
+    "b90ec68a0100000000ffffffff02202cb206000000001976a9148280b37df378db99f66f85"
+    "c95a783a76ac7a6d5988ac9093510d000000001976a9143bde42dbee7e4dbe6a21b2d50ce2"
+    "f0167faa815988ac11000000"
+)
+bip143_script_code = bytes.fromhex("76a9141d0f172a0ecb48aee1be1f2687d2963ae33f71a188ac")
+
+
+class LegacySighashTest(TestCase):
+    def test_legacy(self):
+        tx = Transaction.from_hex(bytes.fromhex(legacy_hex))
+        z = TransactionSighash(tx).legacy(0, legacy_script_pubkey)
+        self.assertEqual(
+            z, 0x27E0C5994DEC7824E56DEC6B2FCB342EB7CDB0D0957C2FCE9882F715E85D81A6
+        )
+
+        # the signature in the input's script signs exactly this hash
+        script_sig = tx.inputs[0].hex[37:-4]
+        der, sec = script_sig[1:72], script_sig[74:]
+        point = S256Point.parse(sec)
+        self.assertTrue(point.verify(z, Signature.parse(der)))
+
+    def test_legacy_hash_types(self):
+        tx = Transaction.from_hex(bytes.fromhex(legacy_hex))
+        sighash = TransactionSighash(tx)
+        hashes = {
+            sighash.legacy(0, legacy_script_pubkey, hash_type)
+            for hash_type in (
+                SIGHASH_ALL,
+                SIGHASH_NONE,
+                SIGHASH_SINGLE,
+                SIGHASH_ALL | SIGHASH_ANYONECANPAY,
+            )
+        }
+        self.assertEqual(len(hashes), 4)
+        self.assertEqual(
+            sighash.legacy(5, legacy_script_pubkey, SIGHASH_SINGLE), SIGHASH_SINGLE_BUG
+        )
+        self.assertEqual(SIGHASH_SINGLE_BUG.to_bytes(32, "big"), b"\x01" + bytes(31))
+
+
+class SegwitSighashTest(TestCase):
+    def test_bip143(self):
+        tx = Transaction.from_hex(bytes.fromhex(bip143_hex))
+        sighash = TransactionSighash(tx)
+        self.assertEqual(
+            sighash.hash_prevouts.hex(),
+            "96b827c8483d4e9b96712b6713a7b68d6e8003a781feba36c31143470b4efd37",
+        )
+        self.assertEqual(
+            sighash.hash_sequence.hex(),
+            "52b0a642eea2fb7ae638c36f6252b6750293dbe574a806984b8e4d8548339a3b",
+        )
+        self.assertEqual(
+            sighash.hash_outputs.hex(),
+            "863ef3e1a92afbfdb97f31ad0fc7683ee943e9abcf2501590ff8f6551f47e5e5",
+        )
+        z = sighash.segwit_v0(1, bip143_script_code, 600000000)
+        self.assertEqual(
+            z, 0xC37AF31116D1B27CAF68AAE9E3AC82F1477929014D5B917657D0EB49478CB670
+        )
+
+
+class TaprootSighashTest(TestCase):
+    def test_taproot(self):
+        tx = Transaction.from_hex(bytes.fromhex(bip143_hex))
+        amounts = [625000000, 600000000]
+        scripts = [b"\x51\x20" + bytes(32), b"\x51\x20" + b"\x01" * 32]
+
+        sighash = TransactionSighash(tx)
+        z0 = sighash.taproot(0, amounts, scripts)
+        z1 = sighash.taproot(1, amounts, scripts)
+        self.assertNotEqual(z0, z1)
+        self.assertNotEqual(z0, sighash.taproot(0, amounts, scripts, SIGHASH_ALL))
+        self.assertNotEqual(z0, sighash.taproot(0, amounts, scripts, annex=b"\x50"))
+
+        # every spent amount is committed to
+        other = TransactionSighash(tx).taproot(0, [625000000, 1], scripts)
+        self.assertNotEqual(z0, other)
+
+        with self.assertRaises(ValueError):
+            TransactionSighash(tx).taproot(0, amounts[:1], scripts)
+        with self.assertRaises(ValueError):
+            sighash.taproot(0, amounts, scripts, 0x04)
@@ -26,6 +26,140 @@ class TestTx(TestCase):
         # print(tx)
         self.assertEqual(tx.version, 2)
 
+    def test_parse_fields(self):
+        raw_tx = bytes.fromhex(raw_hex)
+        tx = Transaction.from_hex(raw_tx)
+
+        self.assertTrue(tx.is_segwit)
+        self.assertEqual(
+            tx.txid, "2fe0ed0c67728c1b5b78c8874622fb0e89d117281a98c74df483f6ef3ea0c7ff"
+        )
+        self.assertEqual(tx.size, 814)
+        self.assertEqual(tx.vsize, 412)
+        self.assertEqual(tx.locktime, 2431865)
+        self.assertEqual(tx.hex, raw_tx)
+        self.assertEqual(tx.inputs[1].transaction_index, 0)
+        self.assertEqual(tx.inputs[4].sequence_number, 4294967294)
+        self.assertEqual(len(tx.inputs[0].witnesses), 2)
+        self.assertEqual([output.value for output in tx.outputs], [1062588, 77000])
+
+    def test_parse_at_offset(self):
+        raw_tx = bytes.fromhex(raw_hex)
+        tx = Transaction.from_hex(raw_tx)
+
+        # a transaction inside of a larger buffer, such as a block
+        embedded = Transaction.from_hex(b"\xff" * 7 + raw_tx + b"\xff" * 3, 7)
+        self.assertEqual(embedded.txid, tx.txid)
+        self.assertEqual(embedded.hash, tx.hash)
+        self.assertEqual(embedded.hex, raw_tx)
+        self.assertEqual(embedded.inputs[2].hex, tx.inputs[2].hex)
+        self.assertEqual(embedded.outputs[1].hex, tx.outputs[1].hex)
+
+        with self.assertRaises(Exception):
+            Transaction.from_hex(raw_tx[:-2])
+
+    def test_parse_lazy(self):
+        raw_tx = bytes.fromhex(raw_hex)
+        tx = Transaction.from_hex(raw_tx)
+        lazy = Transaction.from_hex(raw_tx, lazy=True)
+
+        # the structural scan alone is enough for the ids and sizes
+        self.assertEqual(lazy.txid, tx.txid)
+        self.assertEqual(lazy.vsize, tx.vsize)
+        self.assertEqual((lazy.n_inputs, lazy.n_outputs), (5, 2))
+        self.assertIsNone(lazy._inputs)
+        self.assertIsNone(lazy._outputs)
+
+        self.assertEqual([i.hex for i in lazy.inputs], [i.hex for i in tx.inputs])
+        self.assertEqual(
+            [i.witnesses for i in lazy.inputs], [i.witnesses for i in tx.inputs]
+        )
+        self.assertEqual([o.hex for o in lazy.outputs], [o.hex for o in tx.outputs])
+
+    def test_serialize(self):
+        raw_tx = bytes.fromhex(raw_hex)
+        tx = Transaction.from_hex(raw_tx)
+
+        # unmodified transactions hand back the parsed bytes
+        self.assertIs(tx.serialize(), raw_tx)
+        self.assertEqual(tx.to_hex(), raw_tx)
+
+        # the legacy serialization is what the txid commits to
+        legacy = tx.serialize(include_witness=False)
+        witness_size = tx.size - tx._offset_before_tx_witnesses - 4
+        self.assertEqual(len(legacy), tx.size - 2 - witness_size)
+        stripped = Transaction.from_hex(legacy)
+        self.assertFalse(stripped.is_segwit)
+        self.assertEqual(stripped.txid, tx.txid)
+        self.assertEqual(stripped.serialize(), legacy)
+
+    def test_serialize_modified(self):
+        raw_tx = bytes.fromhex(raw_hex)
+        tx = Transaction.from_hex(raw_tx)
+        tx.locktime = 0
+        self.assertTrue(tx.modified)
+
+        # a full rewrite through the writer must be byte exact
+        raw = tx.serialize()
+        self.assertEqual(raw[:-4], raw_tx[:-4])
+        self.assertEqual(raw[-4:], bytes(4))
+        self.assertNotEqual(tx.txid, Transaction.from_hex(raw_tx).txid)
+        self.assertEqual(tx.txid, Transaction.from_hex(raw).txid)
+
+        tx.locktime = Transaction.from_hex(raw_tx).locktime
+        self.assertEqual(tx.serialize(), raw_tx)
+
+        tx = Transaction.from_hex(raw_tx)
+        tx.inputs[0].add_witness(b"\x01")
+        reparsed = Transaction.from_hex(tx.serialize())
+        self.assertEqual(reparsed.inputs[0].witnesses[-1], b"\x01")
+        self.assertEqual(reparsed.txid, tx.txid)
+        # sizes follow the new serialization
+        self.assertEqual(tx.size, len(tx.serialize()))
+        self.assertEqual(tx.size, reparsed.size)
+        self.assertEqual(tx.vsize, reparsed.vsize)
+
+    def test_modified_outputs(self):
+        raw_tx = bytes.fromhex(raw_hex)
+        tx = Transaction.from_hex(raw_tx)
+        original = Transaction.from_hex(raw_tx)
+
+        # inputs and outputs are read only, changes go through the setters
+        with self.assertRaises(AttributeError):
+            tx.outputs.pop()
+
+        tx.outputs = tx.outputs[:-1]
+        self.assertTrue(tx.modified)
+        self.assertEqual(tx.n_outputs, 1)
+        reparsed = Transaction.from_hex(tx.serialize())
+        self.assertEqual(len(reparsed.outputs), 1)
+        self.assertNotEqual(tx.hash, original.hash)
+        self.assertEqual(tx.txid, reparsed.txid)
+        self.assertEqual((tx.size, tx.vsize), (reparsed.size, reparsed.vsize))
+        self.assertLess(tx.size, original.size)
+
+    def test_compact_inputs(self):
+        raw_tx = bytes.fromhex(raw_hex)
+        tx = Transaction.from_hex(raw_tx)
+        inp = tx.inputs[0]
+
+        self.assertFalse(hasattr(inp, "__dict__"))
+        self.assertFalse(hasattr(tx.outputs[0], "__dict__"))
+
+        # witness items are offsets into the transaction's bytes
+        table = inp.witness_table()
+        self.assertEqual(len(table), 4)
+        self.assertEqual(raw_tx[table[2] : table[2] + table[3]], inp.witnesses[1])
+        self.assertEqual(len(inp.witnesses[0]), 71)
+
+        # witnesses are read only, changes go through add_witness
+        with self.assertRaises(AttributeError):
+            inp.witnesses.append(b"\x01")
+
+        inp.add_witness(b"\x01")
+        self.assertEqual(len(inp.witnesses), 3)
+        self.assertEqual(inp.witnesses[2], b"\x01")
+
 
 # class TestTxFetcher(TestCase):
 #     def test_fetch_tx(self):
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from tests import test_tx
+from transaction import Transaction
+from tx_cache import DiskTxCache, MemoryTxCache, TieredTxCache
+from tx_fetcher import TxFetcher
+from utils import int_to_le
+
+
+raw_tx = bytes.fromhex(test_tx.raw_hex)
+txid = Transaction.from_hex(raw_tx).txid
+
+
+class StubApi:
+    """Local stand-in for the REST API, serves /tx/<txid>/hex"""
+
+    def __init__(self, txs: dict[str, bytes], delay: float = 0):
+        self.txs = txs
+        self.delay = delay
+        self.requests = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with api.lock:
+                    api.requests.append(self.path)
+                    api.running += 1
+                    api.max_running = max(api.max_running, api.running)
+                time.sleep(api.delay)
+                with api.lock:
+                    api.running -= 1
+
+                parts = self.path.strip("/").split("/")
+                raw = api.txs.get(parts[-2]) if len(parts) >= 2 else None
+                if raw is None:
+                    self.send_response(404)
+                    body = b"Transaction not found"
+                else:
+                    self.send_response(200)
+                    body = raw.hex().encode()
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MemoryTxCacheTest(TestCase):
+    def test_byte_budget(self):
+        cache = MemoryTxCache(maxsize=None, maxbytes=25)
+        for i in range(5):
+            cache.put(str(i), bytes(10))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nbytes, 20)
+        self.assertEqual(cache.evictions, 3)
+        self.assertIsNone(cache.get("0"))
+        self.assertEqual(cache.get("4"), bytes(10))
+
+        cache.put("4", bytes(5))
+        self.assertEqual(cache.nbytes, 15)
+        cache.clear()
+        self.assertEqual(cache.nbytes, 0)
+
+    def test_size_budget(self):
+        cache = MemoryTxCache(maxsize=2, maxbytes=None)
+        for i in range(3):
+            cache.put(str(i), b"x")
+        self.assertNotIn("0", cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_disabled(self):
+        cache = MemoryTxCache(enabled=False)
+        cache.put("0", bytes(10))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.nbytes, 0)
+        self.assertIsNone(cache.get("0"))
+
+
+class DiskTxCacheTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "txs.sqlite")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_persistence(self):
+        with DiskTxCache(self.path) as cache:
+            cache.put(txid, raw_tx)
+            self.assertIn(txid, cache)
+
+        with DiskTxCache(self.path) as cache:
+            self.assertEqual(cache.get(txid), raw_tx)
+            self.assertIsNone(cache.get("00" * 32))
+            self.assertEqual(cache.hit_rate(), 0.5)
+
+    def test_tiered(self):
+        with DiskTxCache(self.path) as disk:
+            disk.put(txid, raw_tx)
+
+        cache = TieredTxCache(MemoryTxCache(), DiskTxCache(self.path))
+        self.assertEqual(cache.get(txid), raw_tx)
+        self.assertIn(txid, cache.memory)
+        self.assertEqual(cache.get(txid), raw_tx)
+        self.assertEqual(cache.disk.hits, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+        cache.close()
+
+
+class TxFetcherTest(TestCase):
+    def setUp(self):
+        self.api = StubApi({txid: raw_tx})
+        self.cache, self.host = TxFetcher.cache, TxFetcher.remote_host
+        TxFetcher.cache = MemoryTxCache()
+        TxFetcher.remote_host = self.api.url
+
+    def tearDown(self):
+        TxFetcher.cache, TxFetcher.remote_host = self.cache, self.host
+        self.api.close()
+
+    def test_fetch_cached(self):
+        tx = TxFetcher.fetch(txid)
+        self.assertEqual(tx.txid, txid)
+        self.assertEqual(TxFetcher.fetch(txid).hex, raw_tx)
+        self.assertEqual(len(self.api.requests), 1)
+        self.assertEqual(TxFetcher.cache.hits, 1)
+
+        TxFetcher.fetch(txid, fresh=True)
+        self.assertEqual(len(self.api.requests), 2)
+
+    def test_survives_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "txs.sqlite")
+            TxFetcher.cache = TieredTxCache(MemoryTxCache(), DiskTxCache(path))
+            TxFetcher.fetch(txid)
+            TxFetcher.cache.close()
+
+            # a new process starts with an empty memory cache
+            TxFetcher.cache = TieredTxCache(MemoryTxCache(), DiskTxCache(path))
+            TxFetcher.fetch(txid)
+            TxFetcher.cache.close()
+            self.assertEqual(len(self.api.requests), 1)
+
+    def test_not_found(self):
+        with self.assertRaises(ValueError):
+            TxFetcher.fetch("00" * 32)
+
+
+class FetchManyTest(TestCase):
+    def setUp(self):
+        # same transaction with different locktimes
+        raws = [raw_tx[:-4] + int_to_le(i, 4) for i in range(8)]
+        self.txs = {Transaction.from_hex(raw).txid: raw for raw in raws}
+        self.api = StubApi(self.txs, delay=0.05)
+        self.cache, self.host = TxFetcher.cache, TxFetcher.remote_host
+        TxFetcher.cache = MemoryTxCache()
+        TxFetcher.remote_host = self.api.url
+
+    def tearDown(self):
+        TxFetcher.cache, TxFetcher.remote_host = self.cache, self.host
+        self.api.close()
+
+    def test_concurrency_limit(self):
+        txids = list(self.txs)
+        txs = asyncio.run(TxFetcher.fetch_many(txids, concurrency=3))
+        self.assertEqual(list(txs), txids)
+        self.assertEqual([tx.hex for tx in txs.values()], list(self.txs.values()))
+        self.assertEqual(len(self.api.requests), 8)
+        self.assertLessEqual(self.api.max_running, 3)
+        self.assertGreater(self.api.max_running, 1)
+
+        # all cached now
+        asyncio.run(TxFetcher.fetch_many(txids))
+        self.assertEqual(len(self.api.requests), 8)
+
+    def test_coalescing(self):
+        txids = list(self.txs)[:2]
+
+        async def run():
+            return await asyncio.gather(
+                TxFetcher.fetch_many(txids * 3),
+                TxFetcher.fetch_many(txids),
+            )
+
+        first, second = asyncio.run(run())
+        self.assertEqual(len(self.api.requests), 2)
+        self.assertEqual(list(first), txids)
+        self.assertEqual(first[txids[0]].hex, second[txids[0]].hex)
+        self.assertEqual(TxFetcher._in_flight, {})
+
+    def test_failure(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(TxFetcher.fetch_many(["00" * 32] + list(self.txs)))
+        with self.assertRaises(ValueError):
+            asyncio.run(TxFetcher.fetch_many([], concurrency=0))
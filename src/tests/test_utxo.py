@@ -0,0 +1,153 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from tests.test_validation import build_tx, script_pubkey
+from transaction import Transaction
+from utils import encode_varint, format_hash, int_to_le
+from utxo import Coin, UTXOSet
+
+
+def coinbase_tx(height: int) -> Transaction:
+    """Coinbase paying 50000 to a p2wpkh script, plus an OP_RETURN output"""
+    raw = int_to_le(1, 4) + b"\x01" + bytes(32) + b"\xff" * 4
+    raw += b"\x03" + int_to_le(height, 3) + b"\xff" * 4
+    raw += b"\x02" + int_to_le(50000, 8) + b"\x16" + script_pubkey
+    raw += int_to_le(0, 8) + b"\x02\x6a\x00" + bytes(4)
+    return Transaction.from_hex(raw)
+
+
+def spend_tx(txid: str, n_inputs: int, value: int) -> Transaction:
+    """Spends the first n_inputs outputs of txid into one output"""
+    raw = int_to_le(2, 4) + encode_varint(n_inputs)
+    for i in range(n_inputs):
+        raw += bytes.fromhex(txid)[::-1] + int_to_le(i, 4) + b"\x00" + b"\xff" * 4
+    raw += b"\x01" + int_to_le(value, 8) + b"\x16" + script_pubkey + bytes(4)
+    return Transaction.from_hex(raw)
+
+
+class CoinTest(TestCase):
+    def test_serialize(self):
+        coin = Coin(50000, script_pubkey, 700000, True)
+        data = coin.serialize()
+        self.assertEqual(Coin.parse(data), coin)
+        self.assertLess(len(data), 32)
+
+
+class UTXOSetTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "utxo.sqlite")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_add_spend(self):
+        txid = "ab" * 32
+        with UTXOSet(self.path) as utxos:
+            utxos.add(txid, 1, Coin(1000, script_pubkey))
+            self.assertIn((txid, 1), utxos)
+            self.assertEqual(utxos.prevout(txid, 1), (1000, script_pubkey))
+            self.assertEqual(utxos.spend(txid, 1).amount, 1000)
+            self.assertNotIn((txid, 1), utxos)
+            with self.assertRaises(ValueError):
+                utxos.spend(txid, 1)
+
+    def test_persistence(self):
+        txid = "cd" * 32
+        with UTXOSet(self.path) as utxos:
+            utxos.add(txid, 0, Coin(1, b"\x51", 5))
+            utxos.add(txid, 1, Coin(2, b"\x52", 5))
+
+        with UTXOSet(self.path) as utxos:
+            self.assertEqual(len(utxos), 2)
+            self.assertEqual(utxos.get(txid, 0), Coin(1, b"\x51", 5))
+            utxos.spend(txid, 0)
+
+        with UTXOSet(self.path) as utxos:
+            self.assertEqual(len(utxos), 1)
+            self.assertIsNone(utxos.get(txid, 0))
+
+    def test_fresh_coins_skip_disk(self):
+        txid = "ef" * 32
+        with UTXOSet(self.path) as utxos:
+            utxos.add(txid, 0, Coin(1, b"\x51"))
+            utxos.spend(txid, 0)
+            self.assertEqual(utxos._dirty, set())
+            self.assertEqual(len(utxos), 0)
+
+    def test_cache_bound(self):
+        utxos = UTXOSet(":memory:", cache_size=10)
+        for vout in range(25):
+            utxos.add("01" * 32, vout, Coin(vout, b"\x51"))
+            self.assertLessEqual(len(utxos._cache), 10)
+        self.assertEqual(utxos.flushes, 2)
+        self.assertEqual(utxos.get("01" * 32, 3).amount, 3)
+        self.assertEqual(len(utxos), 25)
+        utxos.close()
+
+    def test_apply_undo(self):
+        utxos = UTXOSet(":memory:")
+        block1 = [coinbase_tx(1)]
+        utxos.apply_block(block1, height=1)
+        coinbase_txid = block1[0].txid
+        # the OP_RETURN output is never added
+        self.assertEqual(len(utxos), 1)
+        self.assertEqual(utxos.get(coinbase_txid, 0), Coin(50000, script_pubkey, 1, True))
+
+        spend = spend_tx(coinbase_txid, 1, 49000)
+        # spends an output created earlier in the same block
+        chained = spend_tx(spend.txid, 1, 48000)
+        block2 = [coinbase_tx(2), spend, chained]
+        undo = utxos.apply_block(block2, height=2)
+        self.assertEqual(undo, [Coin(50000, script_pubkey, 1, True), Coin(49000, script_pubkey, 2)])
+        self.assertEqual(spend.fee, 1000)
+        self.assertEqual(chained.fee, 1000)
+        self.assertIsNone(utxos.get(coinbase_txid, 0))
+        self.assertIsNotNone(utxos.get(chained.txid, 0))
+        self.assertEqual(len(utxos), 2)
+
+        utxos.undo_block(block2, undo)
+        self.assertEqual(len(utxos), 1)
+        self.assertEqual(utxos.get(coinbase_txid, 0), Coin(50000, script_pubkey, 1, True))
+        self.assertIsNone(utxos.get(spend.txid, 0))
+
+        with self.assertRaises(ValueError):
+            utxos.apply_block([spend_tx("02" * 32, 1, 1)])
+
+    def test_apply_failure_rolls_back(self):
+        utxos = UTXOSet(self.path)
+        block1 = [coinbase_tx(1)]
+        utxos.apply_block(block1, height=1)
+        utxos.flush()
+        coinbase_txid = block1[0].txid
+
+        spend = spend_tx(coinbase_txid, 1, 49000)
+        chained = spend_tx(spend.txid, 1, 48000)
+        # the last transaction spends an output that does not exist
+        block2 = [coinbase_tx(2), spend, chained, spend_tx("02" * 32, 1, 1)]
+        with self.assertRaises(ValueError):
+            utxos.apply_block(block2, height=2)
+
+        self.assertEqual(len(utxos), 1)
+        self.assertEqual(utxos.get(coinbase_txid, 0), Coin(50000, script_pubkey, 1, True))
+        for tx in block2:
+            self.assertIsNone(utxos.get(tx.txid, 0))
+
+        # the block applies cleanly once the bad transaction is dropped
+        undo = utxos.apply_block(block2[:3], height=2)
+        self.assertEqual(len(undo), 2)
+        self.assertEqual(len(utxos), 2)
+        utxos.close()
+
+    def test_fill_values(self):
+        utxos = UTXOSet(":memory:")
+        tx = build_tx(2)
+        for vout in range(2):
+            txid = format_hash((vout + 1).to_bytes(32, "little"))
+            utxos.add(txid, 0, Coin(30000, script_pubkey))
+
+        self.assertIsNone(tx.fee)
+        utxos.fill_values(tx)
+        self.assertEqual([inp.value for inp in tx.inputs], [30000, 30000])
+        self.assertEqual(tx.fee, 10000)
@@ -0,0 +1,136 @@
+from unittest import TestCase
+
+from ecc.key import PrivateKey
+from ecc.utils import hash160
+from interpreter import p2pkh_script
+from sighash import SIGHASH_ALL, TransactionSighash
+from transaction import Transaction
+from utils import encode_varint, format_hash, int_to_le
+from validation import (
+    INPUTS_PER_TASK,
+    Prevout,
+    ValidationEngine,
+    validate_transactions,
+)
+
+
+key = PrivateKey(8675309)
+sec = key.point.sec()
+h160 = hash160(sec)
+script_pubkey = b"\x00\x14" + h160
+amount = 50000
+
+
+def build_tx(n_inputs: int, witnesses: list[list[bytes]] = None) -> Transaction:
+    """p2wpkh inputs spending output 0 of the made up transactions 1, 2 ..."""
+    raw = int_to_le(2, 4) + b"\x00\x01" + encode_varint(n_inputs)
+    for i in range(n_inputs):
+        raw += (i + 1).to_bytes(32, "little") + int_to_le(0, 4) + b"\x00"
+        raw += b"\xff\xff\xff\xff"
+    raw += b"\x01" + int_to_le(amount, 8) + b"\x16" + script_pubkey
+    for witness in witnesses or [[]] * n_inputs:
+        raw += encode_varint(len(witness))
+        raw += b"".join(encode_varint(len(item)) + item for item in witness)
+    raw += int_to_le(0, 4)
+    return Transaction.from_hex(raw)
+
+
+def signed_tx(n_inputs: int) -> Transaction:
+    sighash = TransactionSighash(build_tx(n_inputs))
+    witnesses = []
+    for i in range(n_inputs):
+        z = sighash.segwit_v0(i, p2pkh_script(h160), amount, SIGHASH_ALL)
+        witnesses.append([key.sign(z).der() + bytes([SIGHASH_ALL]), sec])
+    return build_tx(n_inputs, witnesses)
+
+
+def broken_verify(sec: bytes, der: bytes, z: int) -> bool:
+    raise RuntimeError("broken")
+
+
+def prevouts(n_inputs: int) -> dict:
+    return {
+        (format_hash((i + 1).to_bytes(32, "little")), 0): Prevout(amount, script_pubkey)
+        for i in range(n_inputs)
+    }
+
+
+class ValidationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tx = signed_tx(6)
+        cls.prevouts = prevouts(6)
+
+    def test_valid(self):
+        report = validate_transactions(self.tx, self.prevouts, inputs_per_task=4)
+        self.assertTrue(report.valid)
+        self.assertEqual([r.index for r in report.results], list(range(6)))
+        self.assertEqual({r.txid for r in report.results}, {self.tx.txid})
+        self.assertFalse(report.cancelled)
+
+    def test_pool(self):
+        with ValidationEngine(workers=2, inputs_per_task=2) as engine:
+            report = engine.validate([self.tx, self.tx], self.prevouts)
+            self.assertTrue(report.valid)
+            self.assertEqual(len(report.results), 12)
+
+            # the pool is reused between calls
+            prevouts = dict(self.prevouts)
+            key = next(iter(prevouts))
+            prevouts[key] = Prevout(amount + 1, script_pubkey)
+            report = engine.validate(self.tx, prevouts, fail_fast=False)
+            self.assertFalse(report.valid)
+            (failure,) = report.failures
+            self.assertEqual(failure.index, 0)
+
+    def test_fail_fast(self):
+        prevouts = dict(self.prevouts)
+        key = next(iter(prevouts))
+        prevouts[key] = Prevout(amount, p2pkh_script(h160))
+
+        report = validate_transactions(self.tx, prevouts, inputs_per_task=1)
+        self.assertFalse(report)
+        self.assertTrue(report.cancelled)
+        self.assertEqual(len(report.failures), 1)
+        self.assertEqual(len(report.skipped), 5)
+        self.assertIsNotNone(report.failures[0].error)
+
+        report = validate_transactions(
+            self.tx, prevouts, inputs_per_task=1, fail_fast=False
+        )
+        self.assertEqual(len(report.failures), 1)
+        self.assertEqual(len(report.skipped), 0)
+
+    def test_missing_prevout(self):
+        def lookup(txid, vout):
+            return None
+
+        report = validate_transactions(self.tx, lookup, fail_fast=False)
+        self.assertEqual(len(report.failures), 6)
+        self.assertTrue(report.failures[0].error.startswith("Missing prevout"))
+
+    def test_coinbase(self):
+        raw = int_to_le(1, 4) + b"\x01" + bytes(32) + b"\xff" * 4
+        raw += b"\x03\x01\x02\x03" + b"\xff" * 4
+        raw += b"\x01" + int_to_le(amount, 8) + b"\x16" + script_pubkey + bytes(4)
+        coinbase = Transaction.from_hex(raw)
+        report = validate_transactions([coinbase, self.tx], self.prevouts)
+        self.assertTrue(report.valid)
+        self.assertEqual(len(report.results), 6)
+
+    def test_bad_task_size(self):
+        with self.assertRaises(ValueError):
+            ValidationEngine(inputs_per_task=0)
+
+    def test_unexpected_errors(self):
+        engine = ValidationEngine(verify=broken_verify)
+        report = engine.validate(self.tx, self.prevouts, fail_fast=False)
+        self.assertEqual(len(report.failures), 6)
+        self.assertIn("broken", report.failures[0].error)
+
+    def test_unit_size(self):
+        self.assertEqual(ValidationEngine()._unit_size(1000), INPUTS_PER_TASK)
+        engine = ValidationEngine(workers=2)
+        self.assertEqual(engine._unit_size(10), INPUTS_PER_TASK)
+        # 8 units at most for 2 workers
+        self.assertEqual(engine._unit_size(1000), 125)
@@ -1,4 +1,5 @@
 import hashlib
+from array import array
 from io import BytesIO
 from typing import Self, List
 import pprint
@@ -12,6 +13,8 @@ from utils import (
     read_varint,
     encode_varint,
     int_to_le,
+    varint_size,
+    ByteWriter,
     decode_varint,
     double_sha256,
     format_hash,
@@ -38,86 +41,174 @@ TX_IN_BYTE_LEN = 32
 class Transaction:
     """Represents a bitcoin transaction"""
 
-    def __init__(self, raw_hex: bytes):
+    def __init__(self, raw_hex: bytes, offset: int = 0, lazy: bool = False):
         self._hash = None
         self._txid = None
-        self.inputs = None
-        self.outputs = None
+        self._hex = None
+        self._inputs = None
+        self._outputs = None
         self._version = None
         self._locktime = None
         self._size = None
+        self._modified = False
         self.n_inputs = 0
         self.n_outputs = 0
         self.is_segwit = False
 
-        offset = 4
+        # parsing walks a cursor over a memoryview of raw_hex and only
+        # records where every input, output and witness stack starts, the
+        # objects themselves are built from those offsets
+        buffer = memoryview(raw_hex)
+        self._buffer = buffer
+        self._offset = offset
+
+        cursor = offset + 4
 
         # adds basic support for segwit transactions
         #   - https://bitcoincore.org/en/segwit_wallet_dev/
         #   - https://en.bitcoin.it/wiki/Protocol_documentation#BlockTransactions
-        if b"\x00\x01" == raw_hex[offset : offset + 2]:
+        if b"\x00\x01" == buffer[cursor : cursor + 2]:
             self.is_segwit = True
-            offset += 2
+            cursor += 2
 
-        self.n_inputs, varint_size = decode_varint(raw_hex[offset:])
-        offset += varint_size
+        self.n_inputs, varint_size = decode_varint(buffer, cursor)
+        cursor += varint_size
 
-        self.inputs = []
+        # offset tables are kept in arrays, 8 bytes per entry
+        # outpoint (36 bytes), script, sequence (4 bytes)
+        self._input_offsets = array("Q")
         for i in range(self.n_inputs):
-            input = Input.from_hex(raw_hex[offset:])
-            offset += input.size
-            self.inputs.append(input)
+            self._input_offsets.append(cursor)
+            script_length, varint_size = decode_varint(buffer, cursor + 36)
+            cursor += 36 + varint_size + script_length + 4
 
-        self.n_outputs, varint_size = decode_varint(raw_hex[offset:])
-        offset += varint_size
+        self.n_outputs, varint_size = decode_varint(buffer, cursor)
+        cursor += varint_size
 
-        self.outputs = []
+        # value (8 bytes), script
+        self._output_offsets = array("Q")
         for i in range(self.n_outputs):
-            output = Output.from_hex(raw_hex[offset:])
-            offset += output.size
-            self.outputs.append(output)
+            self._output_offsets.append(cursor)
+            script_length, varint_size = decode_varint(buffer, cursor + 8)
+            cursor += 8 + varint_size + script_length
 
+        self._witness_offsets = array("Q")
         if self.is_segwit:
-            self._offset_before_tx_witnesses = offset
-            for inp in self.inputs:
-                tx_witnesses_n, varint_size = decode_varint(raw_hex[offset:])
-                offset += varint_size
+            self._offset_before_tx_witnesses = cursor - offset
+            for i in range(self.n_inputs):
+                self._witness_offsets.append(cursor)
+                tx_witnesses_n, varint_size = decode_varint(buffer, cursor)
+                cursor += varint_size
                 for j in range(tx_witnesses_n):
-                    component_length, varint_size = decode_varint(raw_hex[offset:])
-                    offset += varint_size
-                    witness = raw_hex[offset : offset + component_length]
-                    inp.add_witness(witness)
-                    offset += component_length
+                    component_length, varint_size = decode_varint(buffer, cursor)
+                    cursor += varint_size + component_length
 
-        self._size = offset + 4
-        self.hex = raw_hex[: self._size]
+        self._size = cursor + 4 - offset
 
-        if self._size != len(self.hex):
+        if offset + self._size > len(buffer):
             raise Exception("Incomplete transaction!")
 
+        # keep the caller's bytes when they hold exactly this transaction
+        if isinstance(raw_hex, bytes) and offset == 0 and len(raw_hex) == self._size:
+            self._hex = raw_hex
+
+        # lazy transactions build their inputs and outputs on first access
+        if not lazy:
+            self.inputs
+            self.outputs
+
     def __repr__(self):
         return f"Transaction({self.hash})"
 
+    def _view(self):
+        """Returns a memoryview of this transaction's bytes, without copying"""
+        return self._buffer[self._offset : self._offset + self._size]
+
+    @property
+    def inputs(self):
+        """Returns a tuple of the transaction's inputs. It is read only so
+        every change goes through the setter and is tracked"""
+        if self._inputs is None:
+            witness_offsets = self._witness_offsets or [None] * self.n_inputs
+            self._inputs = tuple(
+                Input.from_hex(self._buffer, offset, witness_offset)
+                for offset, witness_offset in zip(self._input_offsets, witness_offsets)
+            )
+        return self._inputs
+
+    @inputs.setter
+    def inputs(self, inputs):
+        self._inputs = tuple(inputs)
+        self.n_inputs = len(self._inputs)
+        self._modified = True
+
+    @property
+    def outputs(self):
+        """Returns a tuple of the transaction's outputs, see inputs"""
+        if self._outputs is None:
+            self._outputs = tuple(
+                Output.from_hex(self._buffer, offset) for offset in self._output_offsets
+            )
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, outputs):
+        self._outputs = tuple(outputs)
+        self.n_outputs = len(self._outputs)
+        self._modified = True
+
+    @property
+    def hex(self):
+        """Returns the raw bytes of the transaction"""
+        if self._hex is None:
+            self._hex = bytes(self._view())
+        return self._hex
+
     @property
     def version(self):
         """Returns the transaction's version number"""
         if self._version is None:
-            self._version = decode_uint32(self.hex[:4])
+            self._version = decode_uint32(self._view()[:4])
         return self._version
 
+    @version.setter
+    def version(self, version):
+        self._version = version
+        self._modified = True
+
     @property
     def locktime(self):
         """Returns the transaction's locktime as an int"""
         if self._locktime is None:
-            self._locktime = decode_uint32(self.hex[-4:])
+            self._locktime = decode_uint32(self._view()[-4:])
         return self._locktime
 
+    @locktime.setter
+    def locktime(self, locktime):
+        self._locktime = locktime
+        self._modified = True
+
+    @property
+    def modified(self):
+        """Returns whether the transaction was changed since it was parsed"""
+        if self._modified:
+            return True
+
+        # witnesses added by hand are kept by the input itself
+        if self._inputs is not None:
+            return any(inp._witnesses is not None for inp in self._inputs)
+
+        return False
+
     @property
     def hash(self):
         """Returns the transaction's id. Equivalent to the hash for non SegWit transactions,
         it differs from it for SegWit ones."""
+        if self.modified:
+            return format_hash(double_sha256(self.serialize()))
+
         if self._hash is None:
-            self._hash = format_hash(double_sha256(self.hex))
+            self._hash = format_hash(double_sha256(self._view()))
 
         return self._hash
 
@@ -125,11 +216,17 @@ class Transaction:
     def size(self):
         """Returns the transactions size in bytes including the size of the
         witness data if there is any."""
+        if self.modified:
+            return len(self.serialize())
         return self._size
 
     @property
     def vsize(self):
         """Returns the transaction size in virtual bytes."""
+        if self.modified:
+            stripped_size = len(self.serialize(include_witness=False))
+            return ceil((stripped_size * 3 + self.size) / 4)
+
         if not self.is_segwit:
             return self._size
         else:
@@ -150,18 +247,20 @@ class Transaction:
     def txid(self):
         """Returns the transaction's id. Equivalent to the hash for non SegWit transactions,
         it differs from it for SegWit ones."""
+        if self.modified:
+            return format_hash(double_sha256(self.serialize(include_witness=False)))
+
         if self._txid is None:
             # segwit transactions have two transaction ids/hashes, txid and wtxid
             # txid is a hash of all of the legacy transaction fields only
+            view = self._view()
             if self.is_segwit:
-                txid_data = (
-                    self.hex[:4]
-                    + self.hex[6 : self._offset_before_tx_witnesses]
-                    + self.hex[-4:]
-                )
+                sha = hashlib.sha256(view[:4])
+                sha.update(view[6 : self._offset_before_tx_witnesses])
+                sha.update(view[-4:])
+                self._txid = format_hash(hashlib.sha256(sha.digest()).digest())
             else:
-                txid_data = self.hex
-            self._txid = format_hash(double_sha256(txid_data))
+                self._txid = format_hash(double_sha256(view))
 
         return self._txid
 
@@ -172,6 +271,18 @@ class Transaction:
                 return True
         return False
 
+    @property
+    def fee(self):
+        """Returns the fee paid by the transaction in satoshis, None for a
+        coinbase or while the value of an input is not known"""
+        if self.is_coinbase():
+            return None
+
+        values = [input.value for input in self.inputs]
+        if None in values:
+            return None
+        return sum(values) - sum(output.value for output in self.outputs)
+
     def uses_replace_by_fee(self):
         """Returns whether the transaction opted-in for RBF"""
         # Coinbase transactions may have a sequence number that signals RBF
@@ -186,25 +297,52 @@ class Transaction:
                 return True
         return False
 
-    def to_hex(self) -> bytes:
-        result = int_to_le(self.version, 4)
-
-        result += encode_varint(len(self.tx_ins))
-
-        for tx_in in self.tx_ins:
-            result += tx_in.serialize()
+    def serialize(self, include_witness: bool = True) -> bytes:
+        """Returns the serialized transaction, in segwit format when it has
+        witness data and include_witness is set, in legacy format otherwise.
+        An unmodified transaction returns the bytes it was parsed from"""
+        if not self.modified and (include_witness or not self.is_segwit):
+            return self.hex
+
+        segwit = include_witness and any(inp.witnesses for inp in self.inputs)
+
+        inputs, outputs = self.inputs, self.outputs
+        size = (
+            8
+            + varint_size(len(inputs))
+            + sum(inp.size for inp in inputs)
+            + varint_size(len(outputs))
+            + sum(output.size for output in outputs)
+        )
+        if segwit:
+            size += 2 + sum(inp.witness_size() for inp in inputs)
+
+        writer = ByteWriter(size)
+        writer.write_uint32(self.version)
+        if segwit:
+            writer.write(b"\x00\x01")
+
+        writer.write_varint(len(inputs))
+        for inp in inputs:
+            inp.serialize_into(writer)
+
+        writer.write_varint(len(outputs))
+        for output in outputs:
+            output.serialize_into(writer)
+
+        if segwit:
+            for inp in inputs:
+                inp.serialize_witness_into(writer)
+
+        writer.write_uint32(self.locktime)
+        return writer.getvalue()
 
-        result += encode_varint(len(self.tx_outs))
-
-        for tx_out in self.tx_outs:
-            result += tx_out.serialize()
-
-        result += int_to_le(self.locktime, 4)
-        return result
+    def to_hex(self) -> bytes:
+        return self.serialize()
 
     def to_json():
         return {}
 
     @classmethod
-    def from_hex(cls, hex: bytes):
-        return cls(hex)
+    def from_hex(cls, hex: bytes, offset: int = 0, lazy: bool = False):
+        return cls(hex, offset, lazy)
@@ -0,0 +1,190 @@
+"""Caches of raw transactions for TxFetcher
+
+Every cache maps a txid to the raw bytes of its transaction and shares
+the same small interface: get, put, __contains__, clear, and the hits,
+misses and evictions counters with hit_rate(). Transactions are cached as
+bytes rather than Transaction objects, so callers never share mutable
+objects and parsing a cached transaction is as cheap as parsing a lazy one.
+
+    - MemoryTxCache: LRU in memory, bounded by entries and/or bytes
+    - DiskTxCache: sqlite store that survives restarts
+    - TieredTxCache: a memory cache in front of a disk cache
+"""
+
+import sqlite3
+from threading import Lock
+
+from ecc.cache import LRUCache
+
+
+# default budget of the in-memory cache
+DEFAULT_MAX_TXS = 10000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class MemoryTxCache(LRUCache):
+    """Thread safe LRU cache of raw transactions. maxsize bounds the number
+    of transactions and maxbytes their total size, None disables a bound"""
+
+    def __init__(
+        self,
+        maxsize: int | None = DEFAULT_MAX_TXS,
+        maxbytes: int | None = DEFAULT_MAX_BYTES,
+        enabled: bool = True,
+    ) -> None:
+        if maxbytes is not None and maxbytes < 0:
+            raise ValueError(f"Byte budget {maxbytes} can not be negative")
+
+        super().__init__(float("inf") if maxsize is None else maxsize, enabled)
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"MemoryTxCache(size={len(self)}, nbytes={self.nbytes}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def put(self, key: str, value: bytes) -> None:
+        if not self.enabled or self.maxsize == 0:
+            return
+
+        with self._lock:
+            old = self._data.get(key)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self.nbytes += len(value)
+            self._evict()
+
+    def clear(self) -> None:
+        super().clear()
+        self.nbytes = 0
+
+    def _evict(self) -> None:
+        data = self._data
+        while len(data) > self.maxsize or (
+            self.maxbytes is not None and self.nbytes > self.maxbytes
+        ):
+            _, value = data.popitem(last=False)
+            self.nbytes -= len(value)
+            self.evictions += 1
+
+
+class DiskTxCache:
+    """Persistent cache of raw transactions in a sqlite database. It is
+    not bounded, transactions never change once confirmed"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS txs (txid TEXT PRIMARY KEY, raw BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def __repr__(self) -> str:
+        return f"DiskTxCache({self.path}, hits={self.hits}, misses={self.misses})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM txs").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            query = "SELECT 1 FROM txs WHERE txid = ?"
+            return self._db.execute(query, (key,)).fetchone() is not None
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            query = "SELECT raw FROM txs WHERE txid = ?"
+            row = self._db.execute(query, (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO txs VALUES (?, ?)", (key, value))
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM txs")
+            self.hits = self.misses = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class TieredTxCache:
+    """Memory cache in front of a disk cache. Disk hits are copied into
+    memory and every put goes to both. The counters are those of the
+    whole cache, a miss is a transaction found in neither"""
+
+    def __init__(self, memory: MemoryTxCache, disk: DiskTxCache) -> None:
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"TieredTxCache({self.memory}, {self.disk})"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.memory or key in self.disk
+
+    @property
+    def evictions(self) -> int:
+        return self.memory.evictions
+
+    def get(self, key: str, default=None):
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        self.disk.put(key, value)
+        self.memory.put(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self) -> None:
+        self.disk.close()
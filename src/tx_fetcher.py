@@ -1,24 +1,37 @@
-from io import BytesIO
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from dotenv import load_dotenv
 import os
 
-from utils import (
-    le_to_int,
-)
-
 from transaction import Transaction
+from tx_cache import MemoryTxCache
 
 
 load_dotenv()
 
+# requests fetch_many runs at the same time by default
+DEFAULT_CONCURRENCY = 16
+
 API_KEY = os.environ.get("CRYPTO_API_KEY")
 
 import json
 
 
 class TxFetcher:
-    cache = {}
+    """Fetches transactions by id from the remote API.
+
+    Raw transactions are kept in cache, a bounded in-memory LRU by default.
+    Any cache from tx_cache can be swapped in, e.g. to keep transactions
+    across restarts:
+
+        TxFetcher.cache = TieredTxCache(MemoryTxCache(), DiskTxCache(path))
+    """
+
+    cache = MemoryTxCache()
+
+    # API host used instead of RemoteApiCaller's default when set
+    remote_host = None
 
     @classmethod
     def get_url(cls, tx_id: str):
@@ -26,32 +39,112 @@ class TxFetcher:
 
     @classmethod
     def fetch(cls, tx_id, testnet=True, fresh=False):
-        if fresh or (tx_id not in cls.cache):
-            remote_api_caller = RemoteApiCaller()
-            response = remote_api_caller.tx(tx_id)
+        raw = None if fresh else cls.cache.get(tx_id)
+        if raw is None:
+            remote_api_caller = RemoteApiCaller(cls.remote_host)
+            response = remote_api_caller.tx_hex(tx_id)
+            raw = cls.parse_response(tx_id, response)
+            cls.cache.put(tx_id, raw)
+
+        tx = Transaction.from_hex(raw)
+        tx.testnet = testnet
+        return tx
 
+    # txid -> future of its raw bytes, for requests currently running
+    _in_flight = {}
+
+    @classmethod
+    async def fetch_many(
+        cls, tx_ids, testnet=True, fresh=False, concurrency=DEFAULT_CONCURRENCY
+    ) -> dict:
+        """Fetches many transactions concurrently, returns a dict of txid to
+        Transaction. At most `concurrency` requests run at a time. A txid
+        that is repeated, or already being fetched by another fetch_many on
+        the same event loop, is only requested once. Cached transactions
+        are not requested at all unless fresh is set. The first failed
+        request cancels the rest and its error is raised.
+
+        The blocking HTTP calls run on a thread pool, so no async HTTP
+        library is needed:
+
+            txs = asyncio.run(TxFetcher.fetch_many(txids))
+        """
+        if concurrency < 1:
+            raise ValueError(f"Concurrency {concurrency} must be positive")
+
+        loop = asyncio.get_running_loop()
+        unique_ids = list(dict.fromkeys(tx_ids))
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        def request(tx_id):
+            response = RemoteApiCaller(cls.remote_host).tx_hex(tx_id)
+            return cls.parse_response(tx_id, response)
+
+        async def fetch_raw(tx_id):
+            if not fresh:
+                raw = cls.cache.get(tx_id)
+                if raw is not None:
+                    return raw
+
+            future = cls._in_flight.get(tx_id)
+            if future is not None and future.get_loop() is loop:
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # the fetch_many that started it failed, request it here
+                    if not future.cancelled():
+                        raise
+
+            # shielded, so one waiter being cancelled does not cancel the
+            # request for the others
+            future = loop.run_in_executor(executor, request, tx_id)
+            cls._in_flight[tx_id] = future
             try:
-                raw = bytes.fromhex(response.text.strip())
-            except ValueError:
-                raise ValueError("unexpected response: {}".format(response.text))
-            if raw[4] == 0:
-                raw = raw[:4] + raw[6:]
-                tx = Transaction.parse(BytesIO(raw), testnet=testnet)
-                tx.locktime = le_to_int(raw[-4:])
-            else:
-                tx = Transaction.parse(BytesIO(raw), testnet=testnet)
-                if tx.id() != tx_id:
-                    raise ValueError("not the same id: {} vs {}".format(tx.id(), tx_id))
-            cls.cache[tx_id] = tx
-
-        cls.cache[tx_id].testnet = testnet
-        return cls.cache[tx_id]
+                raw = await asyncio.shield(future)
+            finally:
+                if cls._in_flight.get(tx_id) is future:
+                    del cls._in_flight[tx_id]
+            cls.cache.put(tx_id, raw)
+            return raw
+
+        try:
+            # the first failure cancels the other tasks
+            async with asyncio.TaskGroup() as group:
+                tasks = {
+                    tx_id: group.create_task(fetch_raw(tx_id)) for tx_id in unique_ids
+                }
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+        finally:
+            # drops the requests that have not started yet
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        txs = {}
+        for tx_id, task in tasks.items():
+            tx = Transaction.from_hex(task.result())
+            tx.testnet = testnet
+            txs[tx_id] = tx
+        return txs
+
+    @staticmethod
+    def parse_response(tx_id, response: str) -> bytes:
+        """Returns the raw transaction of a hex response, checking that it
+        is the requested transaction"""
+        try:
+            raw = bytes.fromhex(response.strip())
+        except ValueError:
+            raise ValueError("unexpected response: {}".format(response))
+
+        tx = Transaction.from_hex(raw)
+        if tx.txid != tx_id:
+            raise ValueError("not the same id: {} vs {}".format(tx.txid, tx_id))
+        return raw
 
 
 class RemoteApiCaller:
-    def __init__(self) -> None:
+    def __init__(self, remote_host: str = None) -> None:
         self.api_key = API_KEY
-        self.remote_host = "https://blockstream.info/testnet/api/"
+        self.remote_host = remote_host or "https://blockstream.info/testnet/api/"
 
     def tx(self, tx_id):
         url = f"{self.remote_host}/tx/{tx_id}"
@@ -51,9 +51,57 @@ def encode_varint(i: int) -> bytes:
         raise ValueError("integer too large: {}".format(i))
 
 
-def decode_varint(data: bytes):
-    assert len(data) > 0
-    size = int(data[0])
+def varint_size(i: int) -> int:
+    """returns the number of bytes encode_varint uses for i"""
+    if i < 0xFD:
+        return 1
+    elif i < 0x10000:
+        return 3
+    elif i < 0x100000000:
+        return 5
+    return 9
+
+
+class ByteWriter:
+    """Writes into a single preallocated bytearray, so serializing does not
+    build intermediate bytes objects"""
+
+    def __init__(self, size: int) -> None:
+        self.buffer = bytearray(size)
+        self.pos = 0
+
+    def write(self, data: bytes) -> None:
+        end = self.pos + len(data)
+        self.buffer[self.pos : end] = data
+        self.pos = end
+
+    def write_uint32(self, i: int) -> None:
+        struct.pack_into("<I", self.buffer, self.pos, i)
+        self.pos += 4
+
+    def write_uint64(self, i: int) -> None:
+        struct.pack_into("<Q", self.buffer, self.pos, i)
+        self.pos += 8
+
+    def write_varint(self, i: int) -> None:
+        if i < 0xFD:
+            self.buffer[self.pos] = i
+            self.pos += 1
+        else:
+            self.write(encode_varint(i))
+
+    def getvalue(self) -> bytes:
+        if self.pos != len(self.buffer):
+            raise ValueError(f"Wrote {self.pos} of {len(self.buffer)} bytes")
+        return bytes(self.buffer)
+
+
+def decode_varint(data: bytes, offset: int = 0):
+    """Decodes the varint starting at offset in data, which may be bytes or a
+    memoryview, without copying it. Returns the value and the number of
+    bytes consumed"""
+    assert len(data) > offset
+    size = int(data[offset])
     assert size <= 255
 
     if size < 253:
@@ -70,7 +118,7 @@ def decode_varint(data: bytes):
         assert 0, "unknown format_ for size : %s" % size
 
     size = struct.calcsize(format_)
-    return struct.unpack(format_, data[1 : size + 1])[0], size + 1
+    return struct.unpack_from(format_, data, offset + 1)[0], size + 1
 
 
 def format_hash(hash_: bytes):
@@ -0,0 +1,284 @@
+"""Local UTXO set
+
+UTXOSet keeps every unspent output keyed by its 36 byte outpoint, the
+previous transaction's hash followed by the output index, in the same
+byte order as inside transactions. A coin is stored as
+
+    varint(height * 2 + coinbase) || varint(amount) || scriptPubKey
+
+so a typical p2wpkh coin takes under 30 bytes next to its key.
+
+Reads and writes go through a bounded in-memory write-back cache over a
+sqlite database. Coins created since the last flush are marked fresh: if
+they are spent before the next flush they never touch the disk, which is
+most of them when replaying the chain. Once the cache holds more than
+cache_size entries the dirty ones are written in a single transaction and
+the cache is emptied.
+
+Applying a block returns its undo data, the coins it spent, and
+undo_block uses it to roll the block back after a reorg.
+"""
+
+import sqlite3
+from threading import RLock
+from typing import Iterable, NamedTuple
+
+from utils import decode_varint, encode_varint, int_to_le
+from validation import Prevout
+
+
+# entries held in memory before the cache is flushed to disk
+DEFAULT_CACHE_SIZE = 100000
+
+
+class Coin(NamedTuple):
+    amount: int
+    script_pubkey: bytes
+    height: int = 0
+    coinbase: bool = False
+
+    def serialize(self) -> bytes:
+        return (
+            encode_varint(self.height * 2 + self.coinbase)
+            + encode_varint(self.amount)
+            + self.script_pubkey
+        )
+
+    @classmethod
+    def parse(cls, data: bytes):
+        code, size = decode_varint(data)
+        amount, amount_size = decode_varint(data, size)
+        script_pubkey = bytes(data[size + amount_size :])
+        return cls(amount, script_pubkey, code >> 1, bool(code & 1))
+
+
+def outpoint(txid: str, vout: int) -> bytes:
+    """Returns the serialized outpoint of a txid in its displayed hex form
+    and an output index"""
+    return bytes.fromhex(txid)[::-1] + int_to_le(vout, 4)
+
+
+class UTXOSet:
+    """Unspent outputs of a chain, stored in a sqlite database at path.
+
+    ":memory:" keeps everything in memory, which is handy for tests. All
+    methods are thread safe. Changes only reach the database on flush(),
+    close() or when the cache fills up"""
+
+    def __init__(self, path: str, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        if cache_size < 0:
+            raise ValueError(f"Cache size {cache_size} can not be negative")
+
+        self.path = path
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+        # outpoint -> Coin, or None for a coin spent since the last flush
+        self._cache = {}
+        # outpoints changed since the last flush
+        self._dirty = set()
+        # outpoints created since the last flush, not in the database
+        self._fresh = set()
+        self._lock = RLock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS utxo "
+            "(outpoint BLOB PRIMARY KEY, coin BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def __repr__(self) -> str:
+        return f"UTXOSet({self.path}, cached={len(self._cache)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, key: tuple[str, int]) -> bool:
+        return self.get(*key) is not None
+
+    def __len__(self) -> int:
+        """Returns the number of unspent outputs, flushing the cache first"""
+        with self._lock:
+            self.flush()
+            return self._db.execute("SELECT COUNT(*) FROM utxo").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._db.close()
+
+    def _get(self, key: bytes) -> Coin | None:
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        row = self._db.execute(
+            "SELECT coin FROM utxo WHERE outpoint = ?", (key,)
+        ).fetchone()
+        coin = Coin.parse(row[0]) if row else None
+        if coin is not None:
+            # clean entry, dropped again on the next flush
+            self._cache[key] = coin
+        return coin
+
+    def get(self, txid: str, vout: int) -> Coin | None:
+        """Returns the unspent coin of output vout of txid, None if there is
+        no such unspent output"""
+        with self._lock:
+            return self._get(outpoint(txid, vout))
+
+    def prevout(self, txid: str, vout: int) -> Prevout | None:
+        """Prevout lookup for the validation engine"""
+        coin = self.get(txid, vout)
+        return None if coin is None else Prevout(coin.amount, coin.script_pubkey)
+
+    def _add(self, key: bytes, coin: Coin) -> None:
+        # an outpoint the cache knows nothing about is not in the database,
+        # unless a transaction id repeats
+        if key not in self._cache:
+            self._fresh.add(key)
+        self._cache[key] = coin
+        self._dirty.add(key)
+
+    def add(self, txid: str, vout: int, coin: Coin) -> None:
+        with self._lock:
+            self._add(outpoint(txid, vout), coin)
+            self._maybe_flush()
+
+    def _spend(self, key: bytes) -> Coin:
+        coin = self._get(key)
+        if coin is None:
+            txid = key[31::-1].hex()
+            vout = int.from_bytes(key[32:], "little")
+            raise ValueError(f"Output {txid}:{vout} is not unspent")
+
+        if key in self._fresh:
+            # never written, forget it entirely
+            del self._cache[key]
+            self._fresh.discard(key)
+            self._dirty.discard(key)
+        else:
+            self._cache[key] = None
+            self._dirty.add(key)
+        return coin
+
+    def spend(self, txid: str, vout: int) -> Coin:
+        """Removes an unspent output and returns its coin, raises a
+        ValueError if it is not unspent"""
+        with self._lock:
+            coin = self._spend(outpoint(txid, vout))
+            self._maybe_flush()
+            return coin
+
+    def _maybe_flush(self) -> None:
+        if len(self._cache) > self.cache_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes every change since the last flush to the database in one
+        transaction and empties the cache"""
+        with self._lock:
+            writes = []
+            deletes = []
+            for key in self._dirty:
+                coin = self._cache[key]
+                if coin is None:
+                    deletes.append((key,))
+                else:
+                    writes.append((key, coin.serialize()))
+
+            with self._db:
+                self._db.executemany("DELETE FROM utxo WHERE outpoint = ?", deletes)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO utxo VALUES (?, ?)", writes
+                )
+
+            self._cache.clear()
+            self._dirty.clear()
+            self._fresh.clear()
+            self.flushes += 1
+
+    def fill_values(self, tx) -> None:
+        """Sets the value of every input of tx from the outputs they spend,
+        so Input.value and Transaction.fee work without a network lookup"""
+        if tx.is_coinbase():
+            return
+
+        with self._lock:
+            for tx_in in tx.inputs:
+                coin = self._get(tx_in.outpoint)
+                if coin is not None:
+                    tx_in.value = coin.amount
+
+    def apply_block(self, transactions: Iterable, height: int = 0) -> list[Coin]:
+        """Spends the inputs and adds the outputs of a block's transactions,
+        in order. Returns the undo data of the block, the spent coins in
+        the order they were spent. Unspendable OP_RETURN outputs are never
+        added. A ValueError is raised if an input spends an output that is
+        not unspent, every change made by the block is rolled back first so
+        the set is left as it was"""
+        undo = []
+        # outpoints added by the block, and the spent ones in undo order
+        added = []
+        spent = []
+        with self._lock:
+            try:
+                for tx in transactions:
+                    coinbase = tx.is_coinbase()
+                    if not coinbase:
+                        for tx_in in tx.inputs:
+                            coin = self._spend(tx_in.outpoint)
+                            tx_in.value = coin.amount
+                            undo.append(coin)
+                            spent.append(tx_in.outpoint)
+
+                    txid = bytes.fromhex(tx.txid)[::-1]
+                    for vout, output in enumerate(tx.outputs):
+                        script = output.script
+                        if script.is_return():
+                            continue
+                        key = txid + int_to_le(vout, 4)
+                        self._add(key, Coin(output.value, script.bytes, height, coinbase))
+                        added.append(key)
+            except ValueError:
+                self._rollback(added, spent, undo)
+                raise
+
+            self._maybe_flush()
+        return undo
+
+    def _rollback(self, added: list[bytes], spent: list[bytes], undo: list[Coin]):
+        # outputs spent later in the block were added earlier, so restore
+        # the spent coins first, then remove what the block added
+        for key, coin in zip(reversed(spent), reversed(undo)):
+            self._add(key, coin)
+        for key in reversed(added):
+            self._spend(key)
+
+    def undo_block(self, transactions: Iterable, undo: list[Coin]) -> None:
+        """Rolls back apply_block, given the same transactions and the undo
+        data it returned"""
+        undo = list(undo)
+        with self._lock:
+            for tx in reversed(list(transactions)):
+                txid = bytes.fromhex(tx.txid)[::-1]
+                for vout, output in enumerate(tx.outputs):
+                    if not output.script.is_return():
+                        self._spend(txid + int_to_le(vout, 4))
+
+                if not tx.is_coinbase():
+                    for tx_in in reversed(tx.inputs):
+                        self._add(tx_in.outpoint, undo.pop())
+
+            if undo:
+                raise ValueError("Undo data does not match the transactions")
+            self._maybe_flush()
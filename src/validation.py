@@ -0,0 +1,295 @@
+"""Parallel validation of transaction inputs over a process pool
+
+Every input of every transaction is an independent script check, so a
+block's inputs are split into work units of a few inputs of one
+transaction each. Units carry the raw transaction and the spent outputs
+and run on a process pool. Each worker keeps the Interpreter of the
+transactions it has seen, so units of the same transaction share its
+sighash midstates. With fail_fast the engine stops submitting work and
+cancels queued units as soon as one input fails.
+
+Since every unit carries a copy of its transaction, a transaction is
+split into at most UNITS_PER_WORKER units per worker and large ones get
+larger units. The bytes sent for a transaction then grow linearly with
+its size, at the cost of coarser load balancing for the largest ones.
+
+An input whose check raises anything other than a ScriptError is
+reported as invalid with the error, it never aborts the other checks.
+
+The outputs spent by the inputs come from a prevout lookup. That is either
+a mapping or a callable taking (txid, vout), returning a Prevout or None
+when the output is unknown.
+"""
+
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from typing import Callable, Iterable, NamedTuple
+
+from ecc.cache import LRUCache
+from interpreter import Interpreter, ScriptError, verify_signature
+from transaction import Transaction
+
+
+# inputs checked per work unit
+INPUTS_PER_TASK = 16
+
+# most work units a single transaction is split into, per worker
+UNITS_PER_WORKER = 4
+
+
+class Prevout(NamedTuple):
+    amount: int
+    script_pubkey: bytes
+
+
+class InputResult(NamedTuple):
+    txid: str
+    index: int
+    # None when the input was never checked because validation stopped early
+    valid: bool | None
+    error: str | None = None
+
+
+class ValidationReport:
+    """Result of validating a set of transactions, one InputResult per
+    input in transaction and input order. Coinbase inputs are not listed"""
+
+    def __init__(self, results: list[InputResult]):
+        self.results = results
+
+    def __repr__(self) -> str:
+        return (
+            f"ValidationReport(inputs={len(self.results)}, valid={self.valid}, "
+            f"failures={len(self.failures)}, skipped={len(self.skipped)})"
+        )
+
+    def __bool__(self) -> bool:
+        return self.valid
+
+    @property
+    def valid(self) -> bool:
+        """Returns whether every input was checked and is valid"""
+        return all(result.valid for result in self.results)
+
+    @property
+    def failures(self) -> list[InputResult]:
+        return [result for result in self.results if result.valid is False]
+
+    @property
+    def skipped(self) -> list[InputResult]:
+        return [result for result in self.results if result.valid is None]
+
+    @property
+    def cancelled(self) -> bool:
+        """Returns whether validation stopped before checking every input"""
+        return any(result.valid is None for result in self.results)
+
+
+# interpreters of a worker process, keyed by (wtxid, verify) so different
+# witnesses of the same transaction never share one
+_interpreters = LRUCache(64)
+
+
+def _check_task(task, verify: Callable, fail_fast: bool) -> list[tuple]:
+    position, wtxid, raw, checks = task
+    interpreter = _interpreters.get((wtxid, verify))
+    if interpreter is None:
+        try:
+            interpreter = Interpreter(Transaction.from_hex(raw), verify)
+        except Exception as e:
+            error = f"Can not parse transaction: {e!r}"
+            return [(position, index, False, error) for index, _, _ in checks]
+        _interpreters.put((wtxid, verify), interpreter)
+
+    results = []
+    for index, amount, script_pubkey in checks:
+        try:
+            interpreter.check_input(index, script_pubkey, amount)
+        except ScriptError as e:
+            results.append((position, index, False, str(e)))
+            if fail_fast:
+                break
+        except Exception as e:
+            # a bug or a bad verify callback only fails this input
+            results.append((position, index, False, repr(e)))
+            if fail_fast:
+                break
+        else:
+            results.append((position, index, True, None))
+    return results
+
+
+class ValidationEngine:
+    """Validates transactions on a pool of worker processes.
+
+    The pool is started on first use and kept for the engine's lifetime, so
+    one engine should be reused across blocks. With workers set to 1 or
+    None inputs are checked in the calling process. verify is the
+    signature check given to every Interpreter, it must be a picklable
+    module level function when running on a pool"""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        inputs_per_task: int = INPUTS_PER_TASK,
+        max_pending: int | None = None,
+        verify: Callable[[bytes, bytes, int], bool] = verify_signature,
+    ) -> None:
+        if inputs_per_task < 1:
+            raise ValueError(f"Need at least one input per task, got {inputs_per_task}")
+
+        self.workers = workers
+        self.inputs_per_task = inputs_per_task
+        self.max_pending = max_pending or 2 * (workers or 1)
+        self.verify = verify
+        self._pool = None
+
+    def __repr__(self) -> str:
+        return f"ValidationEngine(workers={self.workers})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _unit_size(self, n_inputs: int) -> int:
+        """Returns the inputs per work unit of a transaction, bounding the
+        copies of it sent to the pool"""
+        if not self.workers or self.workers <= 1:
+            return self.inputs_per_task
+        max_units = UNITS_PER_WORKER * self.workers
+        return max(self.inputs_per_task, -(-n_inputs // max_units))
+
+    def _tasks(self, transactions, lookup, results, failures):
+        """Yields the work units, recording inputs whose prevout is missing
+        straight into results"""
+        for position, tx in enumerate(transactions):
+            if tx.is_coinbase():
+                continue
+
+            txid = tx.txid
+            unit_size = self._unit_size(len(tx.inputs))
+            raw = None
+            checks = []
+            for index, tx_in in enumerate(tx.inputs):
+                prevout = lookup(tx_in.transaction_hash, tx_in.transaction_index)
+                if prevout is None:
+                    error = (
+                        f"Missing prevout {tx_in.transaction_hash}:"
+                        f"{tx_in.transaction_index}"
+                    )
+                    result = InputResult(txid, index, False, error)
+                    results[position, index] = result
+                    failures.append(result)
+                    continue
+
+                amount, script_pubkey = prevout
+                checks.append((index, amount, bytes(script_pubkey)))
+                if len(checks) == unit_size:
+                    raw = raw or tx.serialize()
+                    yield position, tx.hash, raw, checks
+                    checks = []
+
+            if checks:
+                yield position, tx.hash, raw or tx.serialize(), checks
+
+    def validate(
+        self,
+        transactions: Transaction | Iterable[Transaction],
+        prevouts: Mapping | Callable[[str, int], Prevout | None],
+        fail_fast: bool = True,
+    ) -> ValidationReport:
+        """Checks every input of the transactions against the outputs they
+        spend and returns a ValidationReport. With fail_fast, validation
+        stops at the first invalid input and unchecked inputs are reported
+        with valid set to None"""
+        if isinstance(transactions, Transaction):
+            transactions = [transactions]
+        transactions = list(transactions)
+
+        if isinstance(prevouts, Mapping):
+
+            def lookup(txid, vout):
+                return prevouts.get((txid, vout))
+
+        else:
+            lookup = prevouts
+
+        results = {}
+        failures = []
+        tasks = self._tasks(transactions, lookup, results, failures)
+        task_func = partial(_check_task, verify=self.verify, fail_fast=fail_fast)
+
+        def record(task_results):
+            for position, index, valid, error in task_results:
+                txid = transactions[position].txid
+                result = results[position, index] = InputResult(
+                    txid, index, valid, error
+                )
+                if not valid:
+                    failures.append(result)
+
+        if not self.workers or self.workers <= 1:
+            for task in tasks:
+                if fail_fast and failures:
+                    break
+                record(task_func(task))
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+            pending = set()
+            for task in tasks:
+                if fail_fast and failures:
+                    break
+
+                pending.add(self._pool.submit(task_func, task))
+                if len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future.result())
+
+            while pending and not (fail_fast and failures):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+
+            # units already running are left to finish, their results are
+            # not waited for
+            for future in pending:
+                future.cancel()
+
+        return ValidationReport(self._report(transactions, results))
+
+    @staticmethod
+    def _report(transactions, results) -> list[InputResult]:
+        report = []
+        for position, tx in enumerate(transactions):
+            if tx.is_coinbase():
+                continue
+            txid = tx.txid
+            for index in range(len(tx.inputs)):
+                result = results.get((position, index))
+                if result is None:
+                    result = InputResult(txid, index, None)
+                report.append(result)
+        return report
+
+
+def validate_transactions(
+    transactions: Transaction | Iterable[Transaction],
+    prevouts: Mapping | Callable[[str, int], Prevout | None],
+    workers: int | None = None,
+    fail_fast: bool = True,
+    inputs_per_task: int = INPUTS_PER_TASK,
+) -> ValidationReport:
+    """Validates transactions with a one off ValidationEngine"""
+    with ValidationEngine(workers, inputs_per_task) as engine:
+        return engine.validate(transactions, prevouts, fail_fast)